@@ -0,0 +1,136 @@
+'''Benchmark the docstring parsers over a corpus of real docstrings, harvested
+from the source of the standard library without importing it, and over
+synthetic adversarial docstrings. For each parser the throughput, the median
+and 99th percentile latency per docstring, the peak memory allocated while
+parsing one docstring and the mean number of memory blocks still allocated
+after parsing one, its result included, are reported. The ``analyze_doc``
+rows time the path used to register commands, with its cache cleared before
+every docstring.
+
+A regression of the latency on the adversarial corpus usually means that a
+regular expression started backtracking.
+
+Usage: python -m benchmarks.bench_corpus [LIMIT]'''
+
+import ast
+import os
+import sys
+import sysconfig
+import time
+import tracemalloc
+
+from benchmarks import bench_fields
+from mando.napoleon import CONFIGS, GoogleDocstring, NumpyDocstring
+from mando.utils import analyze_doc, find_param_docs, purify_doc
+
+
+def harvest(limit):
+    '''Collect up to *limit* docstrings of the functions and classes of the
+    standard library, in a deterministic order.'''
+    root = sysconfig.get_paths()['stdlib']
+    docs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in ('site-packages', 'test', 'tests'))
+        for filename in sorted(filenames):
+            if not filename.endswith('.py'):
+                continue
+            try:
+                with open(os.path.join(dirpath, filename), 'rb') as fobj:
+                    tree = ast.parse(fobj.read())
+            except (SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef,
+                                     ast.ClassDef)):
+                    doc = ast.get_docstring(node)
+                    if doc:
+                        docs.append(doc)
+            if len(docs) >= limit:
+                return docs[:limit]
+    return docs
+
+
+def adversarial():
+    docs = [make(2000) for _, make in bench_fields.CASES]
+    docs.extend([
+        # many lines which look like section headers
+        'Summary.\n\n' + 'Args:\n' * 2000,
+        'Summary.\n\nParameters\n' + '-' * 2000 + '\n' + 'a : int\n' * 2000,
+        # a field list without any indentation
+        'Summary.\n\nArgs:\n' + 'a (int): help\n' * 2000,
+        # long lines without a closing parenthesis or colon
+        'Args:\n    a (' + 'int, ' * 2000 + '\n',
+        'Parameters\n----------\n' + 'a ' * 4000 + '\n',
+    ])
+    return docs
+
+
+def uncached(doctype):
+    def parse(doc):
+        analyze_doc.cache_clear()
+        return analyze_doc(doc, doctype)
+    return parse
+
+
+PARSERS = [
+    ('find_param_docs', find_param_docs),
+    ('analyze_doc', uncached('rest')),
+    ('analyze_doc g', uncached('google')),
+    ('analyze_doc n', uncached('numpy')),
+    ('purify_doc', purify_doc),
+    ('google', lambda doc: GoogleDocstring(doc, CONFIGS['google']).lines()),
+    ('numpy', lambda doc: NumpyDocstring(doc, CONFIGS['numpy']).lines()),
+]
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(parse, docs):
+    latencies = []
+    clock = time.perf_counter_ns
+    for doc in docs:
+        start = clock()
+        parse(doc)
+        latencies.append(clock() - start)
+    total = sum(latencies) / 1e9
+    latencies.sort()
+
+    tracemalloc.start()
+    peak = 0
+    # the results are kept so that their blocks are in the second snapshot
+    results = []
+    before = tracemalloc.take_snapshot()
+    for doc in docs:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        results.append(parse(doc))
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    blocks = sum(stat.count_diff for stat in
+                 after.filter_traces(ignored).compare_to(
+                     before.filter_traces(ignored), 'filename'))
+    return (len(docs) / total, percentile(latencies, .5),
+            percentile(latencies, .99), peak, blocks / len(docs))
+
+
+def main(limit=5000):
+    corpora = [('stdlib', harvest(limit)), ('adversarial', adversarial())]
+    for corpus, docs in corpora:
+        size = sum(map(len, docs))
+        print('{0}: {1} docstrings, {2} KiB'.format(
+            corpus, len(docs), size // 1024))
+        for name, parse in PARSERS:
+            rate, p50, p99, peak, blocks = measure(parse, docs)
+            print('  {0:<16} {1:>9.0f} docs/s  p50 {2:>9.1f} us  '
+                  'p99 {3:>9.1f} us  peak {4:>7.1f} KiB  '
+                  '{5:>7.1f} blocks'.format(
+                      name, rate, p50 / 1e3, p99 / 1e3, peak / 1024, blocks))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,28 @@
+'''Benchmark the discovery of plugins in the current environment, scanning
+the metadata of all the distributions and reading the cache file.
+
+Usage: python -m benchmarks.bench_discovery'''
+
+import os
+import tempfile
+import timeit
+
+from mando.discovery import environment_fingerprint, find_plugins, scan
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cache_file = os.path.join(directory, 'plugins.json')
+        find_plugins(cache_file=cache_file)
+        number = 20
+        for name, func in [
+                ('scan', lambda: scan(['mando.commands',
+                                       'mando.subprograms'])),
+                ('fingerprint', environment_fingerprint),
+                ('cached', lambda: find_plugins(cache_file=cache_file))]:
+            elapsed = timeit.timeit(func, number=number) / number
+            print('{0:<12} {1:>8.2f} ms'.format(name, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
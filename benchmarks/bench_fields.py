@@ -0,0 +1,48 @@
+'''Benchmark the extraction of Sphinx fields from docstrings on adversarial
+inputs. The time per character should stay roughly constant as the input
+grows, showing that the tokenizer runs in linear time.
+
+Usage: python -m benchmarks.bench_fields'''
+
+import timeit
+
+from mando.utils import find_param_docs, purify_doc
+
+
+def long_unterminated_header(n):
+    # used to backtrack cubically in the field regex
+    return ':param ' + 'a' * n + ' !\n'
+
+
+def many_blank_lines(n):
+    return ':param a: help\n' + '    more help\n\n\n' * n
+
+
+def many_fields(n):
+    return 'Summary.\n\n' + ''.join(
+        ':param -p{0}, --param{0} <int>: help\n\n    continued\n\n'.format(i)
+        for i in range(n))
+
+
+CASES = [
+    ('long unterminated header', long_unterminated_header),
+    ('many blank lines', many_blank_lines),
+    ('many fields', many_fields),
+]
+
+
+def main():
+    for name, make in CASES:
+        print(name)
+        for n in (250, 500, 1000, 2000, 4000):
+            doc = make(n)
+            number = 5
+            elapsed = timeit.timeit(lambda: (purify_doc(doc),
+                                             find_param_docs(doc)),
+                                    number=number) / number
+            print('  n={0:<5} {1:>10.3f} ms  {2:>8.2f} ns/char'.format(
+                n, elapsed * 1e3, elapsed * 1e9 / len(doc)))
+
+
+if __name__ == '__main__':
+    main()
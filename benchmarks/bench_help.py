@@ -0,0 +1,37 @@
+'''Benchmark the rendering of the help of a command with a long description,
+without and with the help cache.
+
+Usage: python -m benchmarks.bench_help'''
+
+import timeit
+
+from mando import Program
+
+
+def make_command(program, params):
+    namespace = {}
+    exec('def cmd({0}): pass'.format(
+        ', '.join('param{0}=1'.format(i) for i in range(params))), namespace)
+    cmd = namespace['cmd']
+    cmd.__doc__ = 'Summary line.\n\n{0}\n\n{1}'.format(
+        'A long description, repeated to fill the screen. ' * 200,
+        '\n'.join(':param --param{0} <int>: Help for param{0}.'.format(i)
+                  for i in range(params)))
+    program.command(cmd)
+    return program._subparsers.choices['cmd']
+
+
+def main():
+    for params in (5, 50):
+        parser = make_command(Program('bench'), params)
+        parser.help_cache = None
+        number = 200
+        cold = timeit.timeit(parser.format_help, number=number) / number
+        parser = make_command(Program('bench'), params)
+        cached = timeit.timeit(parser.format_help, number=number) / number
+        print('params={0:<3} rendered {1:>8.3f} ms  cached {2:>8.3f} ms'
+              .format(params, cold * 1e3, cached * 1e3))
+
+
+if __name__ == '__main__':
+    main()
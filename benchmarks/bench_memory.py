@@ -0,0 +1,66 @@
+'''Measure the memory used by each registered command, when the parsers of the
+commands are built lazily, as by default, and when all of them are built, as
+when every command was dispatched, with and without options shared by all the
+commands.
+
+Usage: python -m benchmarks.bench_memory'''
+
+import gc
+import time
+import tracemalloc
+
+from mando import OptionGroup, Program
+
+
+def make_function(index):
+    def cmd(target, count=1, force=False, *paths):
+        '''Process the target.
+
+        :param target: The target to process.
+        :param -c, --count <int>: The number of passes.
+        :param -f, --force: Do not ask for confirmation.
+        :param paths: Additional paths.'''
+    cmd.__name__ = 'cmd{0}'.format(index)
+    return cmd
+
+
+def make_options():
+    group = OptionGroup('common options')
+    group.option('-v', '--verbose', action='store_true')
+    group.option('--config', default='setup.cfg')
+    group.option('-j', '--jobs', type=int, default=1)
+    return group
+
+
+def measure(commands, build_all, shared=False):
+    functions = [make_function(index) for index in range(commands)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    program = Program('bench')
+    if shared:
+        program.share(make_options())
+    for function in functions:
+        program.command(function)
+    if build_all:
+        program._subparsers.choices.values()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / commands, elapsed / commands, program
+
+
+def main():
+    for commands in (1000, 5000):
+        for shared in (False, True):
+            for build_all in (False, True):
+                size, elapsed, _ = measure(commands, build_all, shared)
+                print('commands={0:<5} {1:<6} {2:<7} {3:>8.0f} bytes/command '
+                      ' {4:>7.1f} us/command'.format(
+                          commands, 'built' if build_all else 'lazy',
+                          'shared' if shared else '', size, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+'''Benchmark the throughput of the NumPy and Google docstring parsers, both
+when converting to reStructuredText and when extracting the structure used
+to build commands, and the fixed cost of constructing a parser for a one
+line docstring, paid once per registered command.
+
+Usage: python -m benchmarks.bench_napoleon'''
+
+import timeit
+import tracemalloc
+
+from mando.napoleon import CONFIGS, GoogleDocstring, NumpyDocstring
+
+
+def numpy_docstring(params):
+    return '''Summary line.
+
+Extended description
+on two lines.
+
+Parameters
+----------
+{0}
+Returns
+-------
+int
+    The result.
+
+Notes
+-----
+{1}
+Examples
+--------
+>>> f(1)
+2
+'''.format(''.join('p{0} : int, optional\n    Help for p{0},\n    '
+                   'continued.\n'.format(i) for i in range(params)),
+           'A note.\n' * params)
+
+
+def google_docstring(params):
+    return '''Summary line.
+
+Extended description
+on two lines.
+
+Args:
+{0}
+Returns:
+    int: The result.
+
+Note:
+{1}
+'''.format(''.join('    p{0} (int): Help for p{0},\n        continued.\n'
+                   .format(i) for i in range(params)),
+           '    A note.\n' * params)
+
+
+CASES = [
+    ('numpy', NumpyDocstring, numpy_docstring),
+    ('google', GoogleDocstring, google_docstring),
+]
+
+
+def main():
+    for name, cls, make in CASES:
+        config = CONFIGS[name]
+        for params in (2, 10, 50):
+            doc = make(params)
+            for structured in (False, True):
+                number = max(20, 2000 // params)
+                elapsed = timeit.timeit(
+                    lambda: cls(doc, config, structured=structured),
+                    number=number)
+                print('{0:<7} params={1:<3} {2:<10} {3:>10.0f} docs/s'
+                      .format(name, params,
+                              'structured' if structured else 'rest',
+                              number / elapsed))
+
+
+def construction(number=20000):
+    for name, cls, _ in CASES:
+        config = CONFIGS[name]
+        elapsed = timeit.timeit(
+            lambda: cls('Summary line.', config, structured=True),
+            number=number)
+        tracemalloc.start()
+        parsers = [cls('Summary line.', config, structured=True)
+                   for _ in range(1000)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del parsers
+        print('{0:<7} construction {1:>10.0f} docs/s {2:>8.0f} B/doc'
+              .format(name, number / elapsed, size / 1000))
+
+
+if __name__ == '__main__':
+    main()
+    construction()
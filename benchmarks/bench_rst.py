@@ -0,0 +1,61 @@
+'''Benchmark the rendering of reStructuredText help to ANSI with the native
+renderer and with rst2ansi, when it is installed, including the time needed
+to import each of them.
+
+Usage: python -m benchmarks.bench_rst'''
+
+import subprocess
+import sys
+import timeit
+
+from mando.rst_text_formatter import render, rst2ansi
+
+
+HELP = '''usage: prog pow [-h] [-m MOD] a b
+
+Mimic *Python's* ``pow()`` function, see :func:`pow`.
+
+{0}
+Example::
+
+    $ prog pow 2 10 --mod 3
+
+positional arguments:
+  a                The base.
+  b                The exponent.
+
+options:
+  -h, --help       show this help message and exit
+  -m MOD, --mod MOD
+                   Modulus, **optional**.
+'''.format('* An item with some ``code`` and *emphasis*.\n' * 50)
+
+
+def import_time(module):
+    # mando itself is imported beforehand, as in a real program
+    code = 'import time, mando; t = time.perf_counter(); import {0}; ' \
+           'print(time.perf_counter() - t)'.format(module)
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True)
+    if result.returncode:
+        return None
+    return float(result.stdout)
+
+
+def main():
+    renderers = [('native', render, 'mando.rst_text_formatter'),
+                 ('rst2ansi', rst2ansi, 'rst2ansi')]
+    for name, renderer, module in renderers:
+        seconds = import_time(module)
+        if seconds is None:
+            print('{0:<9} not installed'.format(name))
+            continue
+        number = 200
+        elapsed = timeit.timeit(lambda: renderer(HELP),
+                                number=number) / number
+        print('{0:<9} import {1:>8.2f} ms  render {2:>8.3f} ms'.format(
+            name, seconds * 1e3, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
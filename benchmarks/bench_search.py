@@ -0,0 +1,62 @@
+'''Benchmark the search of the commands of a large program: building the
+index once and then running queries, and loading the index stored in the
+help cache directory, as a new process does.
+
+Usage: python -m benchmarks.bench_search'''
+
+import tempfile
+import time
+import timeit
+
+from mando import Program
+from mando.search import SearchIndex, search
+
+
+WORDS = ('build deploy cache database network user file report index sync '
+         'backup restore migrate render upload check clean config').split()
+
+
+def make_program(commands, directory=None):
+    program = Program('bench', max_listed=20, help_cache_dir=directory)
+    for index in range(commands):
+        first, second = (WORDS[index % len(WORDS)],
+                         WORDS[index // len(WORDS) % len(WORDS)])
+
+        def cmd(target, force=False):
+            pass
+        cmd.__name__ = '{0}-{1}-{2}'.format(first, second, index)
+        cmd.__doc__ = '''{0} the {1}.
+
+        Run the {0} step on every {1} of the target.
+
+        :param target: The {1} to {0}.
+        :param -f, --force: Do not ask for confirmation.'''.format(
+            first.capitalize(), second)
+        program.command(group=first)(cmd)
+    return program
+
+
+def main():
+    for commands in (1000, 10000):
+        program = make_program(commands)
+        start = time.perf_counter()
+        index = SearchIndex(program)
+        build = time.perf_counter() - start
+        for query in ('backup', 'data net', 'confirmation', 'zzz'):
+            number = 50
+            elapsed = timeit.timeit(lambda: index.search(query),
+                                    number=number) / number
+            print('commands={0:<6} build {1:>8.1f} ms  query {2!r:<14} '
+                  '{3:>8.3f} ms'.format(commands, build * 1e3, query,
+                                        elapsed * 1e3))
+        with tempfile.TemporaryDirectory() as directory:
+            search(make_program(commands, directory), 'backup')
+            program = make_program(commands, directory)
+            start = time.perf_counter()
+            search(program, 'backup')
+            print('commands={0:<6} load  {1:>8.1f} ms'.format(
+                commands, (time.perf_counter() - start) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''Benchmark the suggestions for mistyped commands as the number of commands
+grows, compared with computing the distance to every command, and the
+resolution of prefixes of commands.
+
+Usage: python -m benchmarks.bench_suggest'''
+
+import timeit
+
+from mando.suggest import PrefixTrie, TrigramIndex, distance
+
+
+WORDS = ('build deploy cache database network user file report index sync '
+         'backup restore migrate render upload check clean config').split()
+
+
+def names(count):
+    return ['{0}-{1}-{2}'.format(WORDS[i % len(WORDS)],
+                                 WORDS[i // len(WORDS) % len(WORDS)], i)
+            for i in range(count)]
+
+
+def scan(commands, word):
+    return [name for name in commands
+            if distance(word, name, max(1, len(name) // 3)) <=
+            max(1, len(name) // 3)]
+
+
+def main():
+    for count in (100, 1000, 10000):
+        commands = names(count)
+        index = TrigramIndex(commands)
+        for word in ('deplyo-user-1', 'zzz'):
+            number = 20
+            indexed = timeit.timeit(lambda: index.suggest(word),
+                                    number=number) / number
+            scanned = timeit.timeit(lambda: scan(commands, word),
+                                    number=number) / number
+            print('commands={0:<6} {1!r:<16} index {2:>8.3f} ms  '
+                  'scan {3:>8.3f} ms'.format(count, word, indexed * 1e3,
+                                             scanned * 1e3))
+        trie = PrefixTrie()
+        for name in commands:
+            trie.add(name)
+        prefix = commands[-1][:-1]
+        number = 10000
+        elapsed = timeit.timeit(lambda: trie.resolve(prefix),
+                                number=number) / number
+        print('commands={0:<6} resolve {1!r:<14} {2:>8.3f} us'.format(
+            count, prefix, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    main()
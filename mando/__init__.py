@@ -1,6 +1,7 @@
 __version__ = '0.8.2'
 
-from mando.core import Program
+from mando.core import Program, lazy
+from mando.spec import OptionGroup
 
 main = Program()
 command = main.command
@@ -0,0 +1,267 @@
+'''Conversion of type annotations into the callables given to argparse as
+``type``.
+
+Annotations are resolved once, when the command is registered, into a
+converter callable which is cached by annotation. Besides plain callables
+(``int``, ``pathlib.Path``, any function taking a string), the following are
+understood:
+
+    * ``bool``, accepting ``1``/``0``, ``true``/``false``, ``yes``/``no`` and
+      ``on``/``off``;
+    * :py:class:`enum.Enum` subclasses, converted by member name or value;
+    * ``typing.Optional[X]`` and unions with ``None``, converted as ``X``;
+    * ``typing.Literal[...]``, restricted to the given values;
+    * ``list[X]``, ``typing.List[X]``, ``typing.Sequence[X]``, ``set[X]``
+      and ``tuple[X, ...]``, which accept multiple values converted as
+      ``X``.
+
+String annotations, as produced by ``from __future__ import annotations``,
+are parsed when the command is registered to find out whether they are
+optional or sequences, but the type of the values is evaluated only when the
+first value is converted, that is only for the command which runs. Other
+types can be supported with :func:`register`.'''
+
+import argparse
+import ast
+import collections.abc
+import enum
+import typing
+
+try:
+    from types import UnionType as _UnionType
+except ImportError:  # pragma: no cover
+    _UnionType = typing.Union
+
+
+_REGISTRY = {}
+_CACHE = {}
+_SEQUENCE_ORIGINS = (list, tuple, set, frozenset, collections.abc.Sequence,
+                     collections.abc.MutableSequence, collections.abc.Set,
+                     collections.abc.Iterable)
+# The sequences in string annotations, subscripted or, for the ones of the
+# typing module, bare
+_SEQUENCE_NAMES = frozenset(['list', 'tuple', 'set', 'frozenset', 'Sequence',
+                             'MutableSequence', 'AbstractSet', 'Iterable',
+                             'List', 'Tuple', 'Set', 'FrozenSet'])
+_TYPING_SEQUENCE_NAMES = frozenset(name for name in _SEQUENCE_NAMES
+                                   if name[0].isupper())
+_TRUE = frozenset(['1', 'true', 'yes', 'on', 'y', 't'])
+_FALSE = frozenset(['0', 'false', 'no', 'off', 'n', 'f'])
+
+
+def register(tp, converter=None):
+    '''Register *converter* as the callable converting command line strings
+    to *tp*. It can also be used as a decorator::
+
+        @register(Decimal)
+        def to_decimal(value):
+            return Decimal(value.replace(',', '.'))
+
+    :param tp: The annotation to convert.
+    :param converter: A callable taking a string.'''
+    def _register(converter):
+        _REGISTRY[tp] = converter
+        _CACHE.clear()
+        return converter
+    if converter is None:
+        return _register
+    return _register(converter)
+
+
+def to_bool(value):
+    '''Convert a command line string to a boolean.'''
+    lowered = value.strip().lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise argparse.ArgumentTypeError(
+        'invalid boolean value: {0!r}'.format(value))
+
+
+to_bool.__name__ = 'bool'
+register(bool, to_bool)
+
+
+def argparse_kwargs(annotation, positional=False, func=None):
+    '''Return the keyword arguments for ``add_argument()`` derived from an
+    annotation: the ``type`` and, for sequences, ``nargs='*'`` if the
+    parameter is *positional* or the ``append`` action otherwise.
+
+    :param annotation: The annotation of the parameter.
+    :param positional: Whether the parameter is a positional one.
+    :param func: The annotated function, used to evaluate string annotations
+        in its globals.'''
+    if isinstance(annotation, str):
+        item, multiple = _parse_annotation(annotation)
+        kwargs = {'type': _LazyConverter(item, func)}
+    else:
+        item, multiple = _unwrap_sequence(_unwrap_optional(annotation))
+        kwargs = {'type': converter_for(item)}
+    if multiple:
+        kwargs.update({'nargs': '*'} if positional else {'action': 'append'})
+    return kwargs
+
+
+def converter_for(annotation):
+    '''Return the converter for *annotation*, compiling and caching it on
+    first use.'''
+    try:
+        return _CACHE[annotation]
+    except KeyError:
+        converter = _CACHE[annotation] = _compile(annotation)
+    except TypeError:  # unhashable annotation
+        converter = _compile(annotation)
+    return converter
+
+
+def _compile(annotation):
+    try:
+        return _REGISTRY[annotation]
+    except (KeyError, TypeError):
+        pass
+    annotation = _unwrap_optional(annotation)
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        return _literal_converter(typing.get_args(annotation))
+    item, multiple = _unwrap_sequence(annotation)
+    if multiple:
+        return converter_for(item)
+    if isinstance(annotation, type):
+        for base in annotation.__mro__[1:]:
+            if base in _REGISTRY and base is not object:
+                return _REGISTRY[base]
+        if issubclass(annotation, enum.Enum):
+            return _enum_converter(annotation)
+    if origin is not None:
+        return converter_for(origin)
+    if not callable(annotation):
+        raise TypeError('cannot convert to {0!r}'.format(annotation))
+    return annotation
+
+
+def _unwrap_optional(annotation):
+    if typing.get_origin(annotation) in (typing.Union, _UnionType):
+        args = [arg for arg in typing.get_args(annotation)
+                if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _unwrap_sequence(annotation):
+    if annotation is str or annotation is bytes:
+        return annotation, False
+    origin = typing.get_origin(annotation)
+    if origin in _SEQUENCE_ORIGINS:
+        args = [arg for arg in typing.get_args(annotation) if arg is not ...]
+        return (args[0] if args else str), True
+    return annotation, False
+
+
+def _parse_annotation(annotation):
+    '''Return the source of the type of the values of a string annotation
+    and whether it is a sequence, reading only its outer structure.'''
+    try:
+        node = _strip_optional(ast.parse(annotation.strip(),
+                                         mode='eval').body)
+    except SyntaxError:
+        return annotation, False
+    if isinstance(node, ast.Subscript) and \
+            _node_name(node.value) in _SEQUENCE_NAMES:
+        items = node.slice
+        items = [item for item in getattr(items, 'elts', [items])
+                 if not _is_constant(item, ...)]
+        if not items:
+            return 'str', True
+        return ast.get_source_segment(annotation.strip(), items[0]), True
+    if _node_name(node) in _TYPING_SEQUENCE_NAMES:
+        return 'str', True
+    return ast.get_source_segment(annotation.strip(), node), False
+
+
+def _strip_optional(node):
+    if isinstance(node, ast.Subscript):
+        name = _node_name(node.value)
+        args = getattr(node.slice, 'elts', [node.slice])
+        if name == 'Optional' or name == 'Union':
+            args = [arg for arg in args if not _is_constant(arg, None)]
+            if len(args) == 1:
+                return args[0]
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        if _is_constant(node.left, None):
+            return node.right
+        if _is_constant(node.right, None):
+            return node.left
+    return node
+
+
+def _node_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _is_constant(node, value):
+    return isinstance(node, ast.Constant) and node.value is value
+
+
+def _enum_converter(cls):
+    def convert(value):
+        try:
+            return cls[value]
+        except KeyError:
+            pass
+        for member in cls:
+            if str(member.value) == value:
+                return member
+        raise argparse.ArgumentTypeError(
+            'invalid choice: {0!r} (choose from {1})'.format(
+                value, ', '.join(cls.__members__)))
+    convert.__name__ = cls.__name__
+    return convert
+
+
+def _literal_converter(values):
+    table = dict((str(value), value) for value in values)
+
+    def convert(value):
+        try:
+            return table[value]
+        except KeyError:
+            raise argparse.ArgumentTypeError(
+                'invalid choice: {0!r} (choose from {1})'.format(
+                    value, ', '.join(table)))
+    convert.__name__ = 'choice'
+    return convert
+
+
+class _LazyConverter:
+    '''A converter for the type of the values of a string annotation,
+    evaluated in the globals of the function on first call.'''
+
+    __slots__ = ('annotation', 'func', '_converter')
+
+    def __init__(self, annotation, func):
+        self.annotation = annotation
+        self.func = func
+        self._converter = None
+
+    @property
+    def __name__(self):
+        return self.annotation
+
+    def __repr__(self):
+        return '_LazyConverter({0!r})'.format(self.annotation)
+
+    def resolve(self):
+        if self._converter is None:
+            namespace = getattr(self.func, '__globals__', {})
+            self._converter = converter_for(eval(self.annotation,
+                                                 namespace))
+        return self._converter
+
+    def __call__(self, value):
+        return self.resolve()(value)
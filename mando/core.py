@@ -2,15 +2,21 @@
 ordinary Python functions into commands for the command line. It uses
 :py:module:``argparse`` behind the scenes.'''
 
-import argparse
+import functools
+import importlib
 import inspect
+import os
 import sys
 from inspect import signature
 
-from mando.napoleon import Config, GoogleDocstring, NumpyDocstring
+from mando.converters import argparse_kwargs
+from mando.help import (CommandsAction, HelpCache, HelpParser,
+                        format_entries, show_help)
+from mando.spec import CommandSpec, ParamSpec
+from mando.types import close_resources
 
-from mando.utils import (purify_doc, action_by_type, find_param_docs,
-                         split_doc, ensure_dashes, purify_kwargs)
+from mando.utils import (analyze_doc, action_by_type, ensure_dashes,
+                         purify_kwargs)
 
 
 _POSITIONAL = type('_positional', (object,), {})
@@ -18,10 +24,19 @@ _DISPATCH_TO = '_dispatch_to'
 
 
 class SubProgram:
-    def __init__(self, parser, signatures):
+    def __init__(self, parser, parent=None):
         self.parser = parser
-        self._subparsers = self.parser.add_subparsers()
-        self._signatures = signatures
+        self.parent = parent
+        if isinstance(parser, HelpParser):
+            self._subparsers = parser.add_subparsers(
+                max_listed=parser.max_listed,
+                prefixes=parser.command_prefixes)
+        else:
+            self._subparsers = parser.add_subparsers()
+        # the specs of the commands of this (sub)program, by name
+        self.commands = {}
+        self.subprograms = {}
+        self._shared_options = []
 
     @property
     def name(self):
@@ -39,20 +54,131 @@ class SubProgram:
         assert not hasattr(self, arg.dest), "Invalid option name: " + arg.dest
         return arg
 
-    def add_subprog(self, name, **kwd):
+    def add_subprog(self, name, package=None, **kwd):
+        '''Add a subprogram and return it.
+
+        :param name: The name of the subprogram.
+        :param package: If given, the name of a package whose modules are
+            mounted as subprograms of the new one, see
+            :meth:`mount_package`.'''
         # also always provide help= to fix missing entry in command list
         help = kwd.pop('help', "{} subcommand".format(name))
-        prog = SubProgram(self._subparsers.add_parser(name, help=help, **kwd),
-                          self._signatures)
-        # do not attempt to overwrite existing attributes
-        assert not hasattr(self, name), "Invalid sub-prog name: " + name
-        setattr(self, name, prog)
+        prog = self._mount(name, self._add_parser(name, help=help, **kwd))
+        if package is not None:
+            prog.mount_package(package)
+        return prog
+
+    def _mount(self, name, parser, attribute=True):
+        '''Create the subprogram *name* whose parser is *parser*. It is also
+        made an attribute of this (sub)program if *attribute* is true, which
+        is not the case of the ones named after modules and entry points,
+        only listed in ``subprograms``.'''
+        prog = SubProgram(parser, self)
+        if isinstance(self._subparsers, CommandsAction):
+            prog._subparsers.help_command = '{0} {1}'.format(
+                self._subparsers.help_command, name)
+        if attribute:
+            # do not attempt to overwrite existing attributes
+            assert not hasattr(self, name), "Invalid sub-prog name: " + name
+            setattr(self, name, prog)
+        self.subprograms[name] = prog
         return prog
 
+    def discover(self, commands='mando.commands',
+                 subprograms='mando.subprograms', cache_file=None):
+        '''Add the commands and subprograms declared in the entry points of
+        the installed distributions, see :mod:`mando.discovery`. They are
+        imported only when needed, and are then listed in ``commands`` and
+        ``subprograms``. Unlike the ones added with :meth:`add_subprog`, the
+        subprograms are not attributes of this (sub)program.
+
+        :param commands: The group of the entry points referring to the
+            functions of commands.
+        :param subprograms: The group of the entry points referring to the
+            functions called with a new subprogram to add its commands.
+        :param cache_file: If given, the file where the entry points are
+            cached as long as the installed distributions do not change.'''
+        # imported here, as most programs do not use plugins
+        from mando.discovery import find_plugins
+        for plugin in find_plugins((commands, subprograms), cache_file):
+            if plugin.group == commands:
+                load = self._load_command
+            else:
+                load = self._load_subprogram
+            build = functools.partial(load, plugin)
+            if isinstance(self._subparsers, CommandsAction):
+                self._add_parser(plugin.name, help=None, build=build)
+            else:
+                build(self._add_parser(plugin.name, help=None))
+
+    def mount_package(self, package, directory=None):
+        '''Add a subprogram for each public module and subpackage of
+        *package*, whose ``setup()`` function, if any, is called with the
+        subprogram to add its commands. The modules of a subpackage are
+        mounted in turn as subprograms of its own. The modules are listed
+        from the filesystem and only imported when the subprogram runs or
+        its help is shown. The subprograms are only listed in
+        ``subprograms``, since their names, such as ``parser``, could clash
+        with attributes.
+
+        :param package: The name of the package, which is not imported.
+        :param directory: The directory of the package, if known.'''
+        from mando.discovery import list_modules, package_directory
+        directory = directory or package_directory(package)
+        for name, is_package in list_modules(directory):
+            build = functools.partial(
+                self._load_module, name, '{0}.{1}'.format(package, name),
+                os.path.join(directory, name) if is_package else None)
+            if isinstance(self._subparsers, CommandsAction):
+                self._add_parser(name, help=None, build=build)
+            else:
+                build(self._add_parser(name, help=None))
+
+    def _load_module(self, name, module, directory, parser):
+        prog = self._mount(name, parser, attribute=False)
+        setup = getattr(importlib.import_module(module), 'setup', None)
+        if directory is not None:
+            prog.mount_package(module, directory)
+        if setup is not None:
+            setup(prog)
+
+    def _load_command(self, plugin, parser):
+        spec = self._make_spec(plugin.load(), plugin.name)
+        parser.description = spec.description
+        _build_parser(spec, self, parser)
+        self.commands[plugin.name] = spec
+
+    def _load_subprogram(self, plugin, parser):
+        plugin.load()(self._mount(plugin.name, parser, attribute=False))
+
+    def walk(self, path=()):
+        '''Yield the pairs ``(path, spec)`` of all the commands of this
+        (sub)program and of its subprograms, where ``path`` is the tuple of
+        the names leading to the command.'''
+        for name, spec in self.commands.items():
+            yield path + (name,), spec
+        for name, prog in self.subprograms.items():
+            yield from prog.walk(path + (name,))
+
+    def share(self, *groups):
+        '''Add the options of the given :class:`mando.spec.OptionGroup` to
+        all the commands of this (sub)program and of its subprograms.'''
+        self._shared_options.extend(groups)
+
+    def _option_groups(self):
+        '''Return the option groups shared with the commands of this
+        (sub)program, the ones of the outer programs first.'''
+        outer = self.parent._option_groups() if self.parent else []
+        return outer + self._shared_options
+
     def command(self, *args, **kwargs):
         '''A decorator to convert a function into a command. It can be applied
         as ``@command`` or as ``@command(new_name)``, specifying an alternative
-        name for the command (default one is ``func.__name__``).'''
+        name for the command (default one is ``func.__name__``). A ``group``
+        keyword argument gathers the command with the others of the same
+        group in the help of programs with ``max_listed``, an ``options``
+        one gives a sequence of :class:`mando.spec.OptionGroup` used by the
+        command and an ``aliases`` one other names of the command.'''
         if len(args) == 1 and hasattr(args[0], '__call__'):
             return self._generate_command(args[0])
         else:
@@ -74,89 +200,118 @@ class SubProgram:
         return wrapper
 
     def _generate_command(self, func, name=None, doctype='rest',
-                          *args, **kwargs):
-        '''Generate argparse's subparser.
+                          *args, options=(), **kwargs):
+        '''Generate the spec of the command and its subparser, which is only
+        built when needed if possible.
 
         :param func: The function to analyze.
         :param name: If given, a different name for the command. The default
-            one is ``func.__name__``.'''
+            one is ``func.__name__``.
+        :param options: The option groups used by the command.'''
 
         name = name or func.__name__
-        doc = (inspect.getdoc(func) or '').strip() + '\n'
-
-        if doctype == 'numpy':
-            config = Config(napoleon_google_docstring=False,
-                            napoleon_use_rtype=False)
-            doc = str(NumpyDocstring(doc, config))
-        elif doctype == 'google':
-            config = Config(napoleon_numpy_docstring=False,
-                            napoleon_use_rtype=False)
-            doc = str(GoogleDocstring(doc, config))
-        elif doctype == 'rest':
-            pass
+        spec = self._make_spec(func, name, doctype, options)
+        build = functools.partial(_build_parser, spec, self)
+        if isinstance(self._subparsers, CommandsAction):
+            self._add_parser(name, help=spec.help,
+                             description=spec.description, build=build,
+                             **kwargs)
         else:
-            raise ValueError('doctype must be one of "numpy", "google", '
-                             'or "rest"')
-        cmd_help, cmd_desc = split_doc(purify_doc(doc))
-        subparser = self._subparsers.add_parser(name,
-                                                help=cmd_help or None,
-                                                description=cmd_desc or None,
-                                                **kwargs)
-
-        doc_params = find_param_docs(doc)
-        self._signatures[func.__name__] = signature(func)
-
-        for a, kw in self._analyze_func(func, doc_params):
-            completer = kw.pop('completer', None)
-            arg = subparser.add_argument(*a, **purify_kwargs(kw))
-            if completer is not None:
-                arg.completer = completer
-
-        subparser.set_defaults(**{_DISPATCH_TO: func})
+            build(self._add_parser(name, help=spec.help,
+                                   description=spec.description, **kwargs))
+        self.commands[name] = spec
         return func
 
-    def _analyze_func(self, func, doc_params):
+    def _make_spec(self, func, name, doctype='rest', options=()):
+        '''Return the :class:`mando.spec.CommandSpec` of the command *name*
+        running *func*.'''
+        doc = (inspect.getdoc(func) or '').strip() + '\n'
+        cmd_help, cmd_desc, doc_params = analyze_doc(doc, doctype)
+        spec = CommandSpec(name, func, signature(func), cmd_help or None,
+                           cmd_desc or None, options=options)
+        analyzed = self._analyze_func(func, doc_params, spec.signature)
+        spec.params, spec.stdin_from = make_params(spec.signature, analyzed)
+        return spec
+
+    def _add_parser(self, name, **kwargs):
+        '''Add a subparser, sharing the help cache of this parser.'''
+        if isinstance(self.parser, HelpParser):
+            kwargs.setdefault('help_cache', self.parser.help_cache)
+            kwargs.setdefault('max_listed', self.parser.max_listed)
+            kwargs.setdefault('command_prefixes',
+                              self.parser.command_prefixes)
+        return self._subparsers.add_parser(name, **kwargs)
+
+    def _analyze_func(self, func, doc_params, sig=None):
         '''Analyze the given function, merging default arguments, overridden
         arguments (with @arg) and parameters extracted from the docstring.
 
         :param func: The function to analyze.
         :param doc_params: Parameters extracted from docstring.
+        :param sig: The signature of the function, if already known.
         '''
 
-        # prevent unnecessary inspect calls
-        sig = self._signatures.get(func.__name__) or signature(func)
-        overrides = getattr(func, '_argopts', {})
-        for name, param in sig.parameters.items():
-
-            if param.kind is param.VAR_POSITIONAL:
-                kwargs = {'nargs': '*'}
-                kwargs.update(doc_params.get(name, (None, {}))[1])
-                yield ([name], kwargs)
-                continue
-
-            default = param.default
-            if default is sig.empty:
-                default = _POSITIONAL()
-
-            opts, meta = doc_params.get(name, ([], {}))
-            # check docstring for type first, then type annotation
-            if meta.get('type') is None and param.annotation is not sig.empty:
-                meta['type'] = param.annotation
-
-            override = overrides.get(name, ((), {}))
-            yield merge(name, default, override, opts, meta)
+        sig = sig or signature(func)
+        return analyze_signature(sig, doc_params,
+                                 getattr(func, '_argopts', {}), func)
 
 
 class Program(SubProgram):
-    def __init__(self, prog=None, version=None, **kwargs):
-        parser = argparse.ArgumentParser(prog, **kwargs)
+    '''A program made of commands and subprograms.
+
+    :param prog: The name of the program, by default the one of the script.
+    :param version: If given, the version shown by ``-v`` and ``--version``.
+    :param help_cache_dir: If given, the directory where the rendered help of
+        the commands is cached between runs. It is always cached in memory.
+    :param max_listed: If given, the help of the program and of its
+        subprograms lists at most this number of commands, showing each
+        group of commands as a single entry, and the ``help`` command shows
+        the other ones.
+    :param help_command: Whether to add the ``help`` command, which also
+        searches the commands. By default it is added if *max_listed* is
+        given.
+    :param command_prefixes: Whether commands and subprograms can be given
+        by any prefix of their name or of an alias which is shared with no
+        other one, as ``dep`` for ``deploy``. The other keyword arguments are
+        passed to the :py:class:`argparse.ArgumentParser`.'''
+
+    def __init__(self, prog=None, version=None, help_cache_dir=None,
+                 max_listed=None, help_command=None, command_prefixes=False,
+                 **kwargs):
+        parser = HelpParser(prog, help_cache=HelpCache(help_cache_dir),
+                            max_listed=max_listed,
+                            command_prefixes=command_prefixes, **kwargs)
         if version is not None:
             parser.add_argument('-v', '--version', action='version',
                                 version=version)
 
-        super(Program, self).__init__(parser, dict())
+        super(Program, self).__init__(parser)
         self._options = None
         self._current_command = None
+        if help_command or help_command is None and max_listed is not None:
+            self._generate_command(self._help_command(), 'help')
+
+    def _help_command(self):
+        parser = self.parser
+
+        def help(search=None, *topics):
+            '''Show the commands, or the help of a group or a command.
+
+            :param topics: A group, a command or a subprogram, followed by
+                the names of its commands.
+            :param -s, --search <query>: Show the commands whose name,
+                documentation or parameters match the words of the query.'''
+            if search is None:
+                print(show_help(parser, topics), end='')
+            else:
+                from mando.search import search as search_commands
+                found = search_commands(self, search)
+                title = 'commands matching {0!r}:' if found else \
+                    'no commands matching {0!r}'
+                print(format_entries(title.format(search), (
+                    (' '.join(path), summary) for path, summary in found)),
+                      end='')
+        return help
 
     # Attribute lookup fallback redirecting to (internal) options instance.
     def __getattr__(self, attr):
@@ -182,15 +337,10 @@ class Program(SubProgram):
             self.parser.error("too few arguments")
 
         command = arg_map.pop(_DISPATCH_TO)
-        sig = self._signatures[command.__name__]
-        real_args = []
-        for name, arg in sig.parameters.items():
-            if arg.kind is arg.VAR_POSITIONAL:
-                if arg_map.get(name):
-                    real_args.extend(arg_map.pop(name))
-            else:
-                real_args.append(arg_map.pop(name))
-        return command, real_args
+        for name, value in arg_map.items():
+            if isinstance(value, lazy):
+                arg_map[name] = value()
+        return command.function, command.bind(arg_map)
 
     def execute(self, args):
         '''Parse the arguments and execute the resulting command.
@@ -198,29 +348,136 @@ class Program(SubProgram):
         :param args: The arguments to parse.'''
         command, a = self.parse(args)
         self._current_command = command.__name__
-        return command(*a)
+        try:
+            return command(*a)
+        finally:
+            # the global and shared options are left in the namespace
+            close_resources(a + list(vars(self._options).values()))
 
     def __call__(self):  # pragma: no cover
         '''Parse ``sys.argv`` and execute the resulting command.'''
         return self.execute(sys.argv[1:])
 
 
+class lazy:
+    '''Wrap a callable computing the default value of an argument. The
+    callable is invoked only when the command runs and the argument was not
+    given on the command line, so that expensive defaults are not computed at
+    import time for every command.
+
+    :param func: A callable taking no arguments.
+    :param placeholder: The text shown in the help in place of the default.
+        The default one is derived from the callable's name.'''
+
+    __slots__ = ('func', 'placeholder')
+
+    def __init__(self, func, placeholder=None):
+        self.func = func
+        self.placeholder = placeholder or '<{0}>'.format(
+            getattr(func, '__name__', 'computed'))
+
+    def __call__(self):
+        return self.func()
+
+    def __repr__(self):
+        return self.placeholder
+
+    __str__ = __repr__
+
+
+def _build_parser(spec, prog, parser):
+    '''Add the arguments of the command of *spec*, and the options shared by
+    its (sub)program *prog*, to its *parser*.'''
+    spec.populate(parser, prog._option_groups())
+    parser.set_defaults(**{_DISPATCH_TO: spec})
+
+
+def make_params(sig, analyzed):
+    '''Return a tuple ``(params, stdin_from)``: the :class:`ParamSpec` of the
+    parameters of a signature, built from the arguments yielded by
+    :func:`analyze_signature`, and the name of the parameter read from stdin,
+    if any.'''
+    params = []
+    stdin_from = None
+    for name, (a, kw) in zip(sig.parameters, analyzed):
+        completer = kw.pop('completer', None)
+        if kw.pop('stdin', False):
+            stdin_from = name
+            if sig.parameters[name].kind is not \
+                    inspect.Parameter.VAR_POSITIONAL:
+                # it takes the values given on the command line instead
+                kw.setdefault('nargs', '*')
+        params.append(ParamSpec(name, a, purify_kwargs(kw), completer))
+    return tuple(params), stdin_from
+
+
+def analyze_signature(sig, doc_params, overrides, func=None):
+    '''Yield the positional and keyword arguments of ``add_argument()`` for
+    each parameter of a signature, merging its defaults and annotations, the
+    parameters extracted from the docstring and the overridden arguments.
+
+    :param sig: The :py:class:`inspect.Signature` of the command.
+    :param doc_params: Parameters extracted from docstring.
+    :param overrides: A dictionary of the ``(args, kwargs)`` given to
+        ``@arg``, by parameter name.
+    :param func: The function, if available, in whose globals string
+        annotations are evaluated.'''
+    for name, param in sig.parameters.items():
+
+        if param.kind is param.VAR_POSITIONAL:
+            kwargs = {'nargs': '*'}
+            kwargs.update(doc_params.get(name, (None, {}))[1])
+            kwargs.update(overrides.get(name, ((), {}))[1])
+            if 'default_factory' in kwargs:
+                raise ValueError('default_factory is not supported by the '
+                                 'variadic parameter *{0}, use stdin=True '
+                                 'to read its values from stdin'.format(name))
+            yield ([name], kwargs)
+            continue
+
+        default = param.default
+        if default is sig.empty:
+            default = _POSITIONAL()
+
+        opts, meta = doc_params.get(name, ((), {}))
+        # copy the shared analysis of the docstring before updating it
+        meta = dict(meta)
+        # check docstring for type first, then type annotation
+        if meta.get('type') is None and param.annotation is not sig.empty:
+            meta.update(argparse_kwargs(param.annotation,
+                                        isinstance(default, _POSITIONAL),
+                                        func))
+
+        override = overrides.get(name, ((), {}))
+        yield merge(name, default, override, opts, meta)
+
+
 def merge(arg, default, override, args, kwargs):
     '''Merge all the possible arguments into a tuple and a dictionary.
 
     :param arg: The argument's name.
     :param default: The argument's default value or an instance of _POSITIONAL.
-    :param override: A tuple containing (args, kwargs) given to @arg.
+    :param override: A tuple containing (args, kwargs) given to @arg. A
+        ``default_factory`` keyword is turned into a :class:`lazy` default.
     :param args: The arguments extracted from the docstring.
     :param kwargs: The keyword arguments extracted from the docstring.'''
     opts = [arg]
     if not isinstance(default, _POSITIONAL):
         opts = list(ensure_dashes(args or opts))
         kwargs.update({'default': default, 'dest': arg})
-        kwargs.update(action_by_type(default))
+        inferred = action_by_type(default)
+        if kwargs.get('type') is not None:
+            # an explicit type wins over the one of the default
+            inferred.pop('type', None)
+        kwargs.update(inferred)
+        if kwargs.get('action') in ('store_true', 'store_false'):
+            # flags take no value to convert
+            kwargs.pop('type', None)
     else:
         # positionals can't have a metavar, otherwise the help is screwed
         # if one really wants the metavar, it can be added with @arg
         kwargs['metavar'] = None
     kwargs.update(override[1])
+    if 'default_factory' in kwargs:
+        kwargs['default'] = lazy(kwargs.pop('default_factory'))
     return override[0] or opts, kwargs
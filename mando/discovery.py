@@ -0,0 +1,154 @@
+'''Discovery of commands and subprograms in the entry points of the installed
+distributions.
+
+Distributions declare commands in the ``mando.commands`` group, as functions,
+and subprograms in the ``mando.subprograms`` group, as functions called with
+the new subprogram to add commands to it::
+
+    [project.entry-points."mando.commands"]
+    deploy = "mytool.deploy:deploy"
+
+    [project.entry-points."mando.subprograms"]
+    db = "mytool.db:setup"
+
+See :meth:`mando.core.SubProgram.discover`. The module of a plugin is only
+imported when one of its commands runs or when its help is shown. Since
+reading the metadata of all the distributions is slow in large environments,
+the entry points can be kept in a cache file, which is used as long as the
+same distributions are installed.
+
+Subprograms can also be found in the modules of a package, see
+:meth:`mando.core.SubProgram.mount_package`: each module, or subpackage, is a
+subprogram whose commands are added by its ``setup()`` function. The modules
+are listed from the filesystem and only imported when needed.'''
+
+import collections
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+from mando.utils import CACHE_VERSION, write_atomic
+
+
+COMMANDS_GROUP = 'mando.commands'
+SUBPROGRAMS_GROUP = 'mando.subprograms'
+_METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+
+
+class Plugin(collections.namedtuple('Plugin',
+                                    'group name value distribution')):
+    '''An entry point: its group, its name, the ``module:attribute`` it
+    refers to and the name of its distribution.'''
+
+    __slots__ = ()
+
+    def load(self):
+        '''Import the module of the plugin and return the object it refers
+        to.'''
+        return _metadata().EntryPoint(self.name, self.value,
+                                      self.group).load()
+
+
+def _metadata():
+    # importlib.metadata is slow to import and only needed by the plugins
+    import importlib.metadata
+    return importlib.metadata
+
+
+def environment_fingerprint(path=None):
+    '''Return a digest of the distributions installed in the directories of
+    *path*, by default ``sys.path``: the names and modification times of
+    their metadata directories, which change whenever a distribution is
+    installed, upgraded or removed.'''
+    entries = []
+    for directory in sys.path if path is None else path:
+        try:
+            with os.scandir(directory or os.curdir) as it:
+                for entry in it:
+                    if entry.name.endswith(_METADATA_SUFFIXES):
+                        entries.append((directory, entry.name,
+                                        entry.stat().st_mtime_ns))
+        except OSError:
+            continue
+    return hashlib.sha1(repr(entries).encode('utf-8',
+                                             'surrogateescape')).hexdigest()
+
+
+def scan(groups):
+    '''Return the list of the :class:`Plugin` of the given groups, reading
+    the metadata of all the installed distributions. When several
+    distributions use the same name in a group, the first one wins.'''
+    entry_points = _metadata().entry_points()
+    plugins = []
+    for group in groups:
+        seen = set()
+        if hasattr(entry_points, 'select'):
+            selected = entry_points.select(group=group)
+        else:  # pragma: no cover
+            # Python < 3.10 returns a dict of the entry points by group
+            selected = entry_points.get(group, ())
+        for entry_point in selected:
+            if entry_point.name in seen:
+                continue
+            seen.add(entry_point.name)
+            dist = getattr(entry_point, 'dist', None)
+            plugins.append(Plugin(group, entry_point.name, entry_point.value,
+                                  dist.name if dist is not None else None))
+    return plugins
+
+
+def find_plugins(groups=(COMMANDS_GROUP, SUBPROGRAMS_GROUP),
+                 cache_file=None):
+    '''Return the list of the :class:`Plugin` of the given groups.
+
+    :param groups: The names of the groups of entry points.
+    :param cache_file: If given, the file where the plugins are cached,
+        along with a fingerprint of the installed distributions. They are
+        scanned again only if it changed.'''
+    groups = list(groups)
+    if cache_file is None:
+        return scan(groups)
+    fingerprint = environment_fingerprint()
+    try:
+        with open(cache_file, encoding='utf-8') as fobj:
+            cached = json.load(fobj)
+        if cached['version'] == CACHE_VERSION and \
+                cached['fingerprint'] == fingerprint and \
+                cached['groups'] == groups:
+            return [Plugin(*plugin) for plugin in cached['plugins']]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    plugins = scan(groups)
+    write_atomic(cache_file, json.dumps({
+        'version': CACHE_VERSION, 'fingerprint': fingerprint,
+        'groups': groups, 'plugins': plugins}).encode('utf-8'))
+    return plugins
+
+
+def package_directory(package):
+    '''Return the directory of the package named *package*, without
+    importing it (its parent packages are imported).'''
+    spec = importlib.util.find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError('{0!r} is not a package'.format(package),
+                          name=package)
+    return list(spec.submodule_search_locations)[0]
+
+
+def list_modules(directory):
+    '''Return the sorted list of the pairs ``(name, is_package)`` of the
+    public modules and subpackages in *directory*.'''
+    modules = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            name, ext = os.path.splitext(entry.name)
+            if entry.name.startswith(('_', '.')):
+                continue
+            if ext == '.py' and name.isidentifier() and entry.is_file():
+                modules.setdefault(name, False)
+            elif entry.name.isidentifier() and entry.is_dir() and \
+                    os.path.isfile(os.path.join(entry.path, '__init__.py')):
+                modules[entry.name] = True
+    return sorted(modules.items())
@@ -0,0 +1,454 @@
+'''Rendering of the help of programs and commands.
+
+Formatting the help with argparse, and even more so converting it to ANSI
+with :class:`mando.rst_text_formatter.RSTHelpFormatter`, is expensive for
+long descriptions. The parsers created by :class:`mando.core.Program` keep
+the rendered help and usage in a :class:`HelpCache`, keyed by a fingerprint
+of the parser, the terminal width and the output encoding, so that any
+change to the command invalidates it. The cache lives in memory and,
+optionally, in a directory, to be shared by short-lived processes.
+
+Programs with many commands can also list them in a condensed form, with
+:class:`CommandsAction`: commands are then gathered in groups and only the
+first ones are listed, while the ``help`` command shows the others.'''
+
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import shutil
+import sys
+
+import mando
+from mando.suggest import (AmbiguousPrefix, PrefixTrie, TrigramIndex,
+                           did_you_mean)
+from mando.utils import CACHE_VERSION, write_atomic
+
+
+_SCALAR_TYPES = frozenset([str, int, float, bool])
+# The addresses found in the default repr() of objects
+_ADDRESS_RE = re.compile(r' at 0x[0-9a-fA-F]+')
+# Attributes of the actions which do not affect the help
+_IGNORED_ATTRS = frozenset(['container', '_name_parser_map', '_parser_class',
+                            '_choices_actions', '_prog_prefix', '_groups',
+                            '_summaries', '_names', '_aliases'])
+# The default maximum number of help texts kept on disk
+MAX_CACHE_FILES = 1000
+# Beyond this number of commands, errors do not list them all
+MAX_CHOICES_SHOWN = 10
+# The attribute of the namespace holding the parser of the command being run
+_COMMAND_PARSER = '_command_parser'
+
+
+class HelpCache:
+    '''Rendered help texts, in memory and optionally on disk.
+
+    :param directory: If given, the directory where the help texts are also
+        stored, created if needed.
+    :param max_files: The maximum number of help texts kept in the directory.
+        Beyond it, the least recently used ones are removed.'''
+
+    def __init__(self, directory=None, max_files=MAX_CACHE_FILES):
+        self.directory = directory
+        self.max_files = max_files
+        self._memory = {}
+
+    def get(self, key, render):
+        '''Return the text cached under *key*, calling *render* to compute
+        and store it if it is missing.'''
+        try:
+            return self._memory[key]
+        except KeyError:
+            pass
+        text = self._load(key)
+        if text is None:
+            text = render()
+            self._store(key, text)
+        self._memory[key] = text
+        return text
+
+    def clear(self):
+        '''Empty the in-memory cache.'''
+        self._memory.clear()
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.txt')
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as fobj:
+                text = fobj.read()
+            # the modification time tells the least recently used texts
+            os.utime(path)
+        except (OSError, UnicodeDecodeError):
+            return None
+        return text
+
+    def _store(self, key, text):
+        if self.directory is not None and \
+                write_atomic(self._path(key), text.encode('utf-8')):
+            self._prune()
+
+    def _prune(self):
+        try:
+            with os.scandir(self.directory) as it:
+                files = [(entry.stat().st_mtime_ns, entry.path)
+                         for entry in it if entry.name.endswith('.txt')]
+        except OSError:
+            return
+        if len(files) > self.max_files:
+            files.sort()
+            for _, path in files[:len(files) - self.max_files]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class HelpParser(argparse.ArgumentParser):
+    '''An :py:class:`argparse.ArgumentParser` whose help and usage are
+    rendered once and then served from a :class:`HelpCache`. The subparsers
+    of commands and subprograms share the cache of their parent.
+
+    :param help_cache: The :class:`HelpCache` to use, or ``None`` to render
+        the help every time.
+    :param max_listed: If given, the maximum number of entries listed by the
+        help of the parser, see :class:`CommandsAction`.
+    :param command_prefixes: Whether commands can be given by a prefix of
+        their name or alias shared with no other command.'''
+
+    def __init__(self, *args, help_cache=None, max_listed=None,
+                 command_prefixes=False, **kwargs):
+        super(HelpParser, self).__init__(*args, **kwargs)
+        self.help_cache = help_cache
+        self.max_listed = max_listed
+        self.command_prefixes = command_prefixes
+        self.register('action', 'parsers', CommandsAction)
+
+    def _get_values(self, action, arg_strings):
+        if isinstance(action, CommandsAction) and arg_strings and \
+                arg_strings[0] not in action.choices:
+            try:
+                name = action.resolve(arg_strings[0])
+            except AmbiguousPrefix as exc:
+                raise argparse.ArgumentError(
+                    action, 'ambiguous choice: {0!r} could match {1}'.format(
+                        exc.prefix, ', '.join(map(repr, exc.candidates))))
+            if name is not None:
+                arg_strings = [name] + arg_strings[1:]
+        return super(HelpParser, self)._get_values(action, arg_strings)
+
+    def _check_value(self, action, value):
+        if not isinstance(action, CommandsAction) or value in action.choices:
+            return super(HelpParser, self)._check_value(action, value)
+        msg = 'invalid choice: {0!r}'.format(value)
+        suggestions = action._names.suggest(value)
+        if suggestions:
+            msg += did_you_mean(suggestions)
+        elif len(action.choices) <= MAX_CHOICES_SHOWN:
+            msg += ' (choose from {0})'.format(
+                ', '.join(map(repr, action.choices)))
+        else:
+            msg += ", see '{0}'".format(action.help_command) \
+                if action.max_listed is not None else ''
+        raise argparse.ArgumentError(action, msg)
+
+    def parse_args(self, args=None, namespace=None):
+        args, argv = self.parse_known_args(args, namespace)
+        # the options of the command which was run
+        parser = vars(args).pop(_COMMAND_PARSER, self)
+        if argv:
+            msg = 'unrecognized arguments: {0}'.format(' '.join(argv))
+            options = [arg.split('=', 1)[0] for arg in argv
+                       if arg[:1] in parser.prefix_chars]
+            if options:
+                index = TrigramIndex(parser._option_string_actions)
+                msg += did_you_mean(index.suggest(options[0]))
+            parser.error(msg)
+        return args
+
+    def format_help(self):
+        return self._cached('help', super(HelpParser, self).format_help)
+
+    def format_usage(self):
+        return self._cached('usage', super(HelpParser, self).format_usage)
+
+    def _cached(self, kind, render):
+        if self.help_cache is None:
+            return render()
+        # the help changes with the version of mando and of argparse
+        key = (CACHE_VERSION, mando.__version__, sys.version, kind,
+               fingerprint(self), shutil.get_terminal_size().columns,
+               getattr(sys.stdout, 'encoding', None))
+        return self.help_cache.get(key, render)
+
+
+def fingerprint(parser):
+    '''Return a digest of everything in *parser* which affects its help: the
+    program name, the texts, the formatter and the arguments.'''
+    # the groups refer to the actions by their position
+    positions = dict((id(action), index)
+                     for index, action in enumerate(parser._actions))
+    fields = [parser.prog, parser.usage, parser.description, parser.epilog,
+              parser.prefix_chars, _describe(parser.formatter_class)]
+    for group in parser._action_groups:
+        fields.append((group.title, group.description,
+                       [positions[id(a)] for a in group._group_actions]))
+    for group in parser._mutually_exclusive_groups:
+        fields.append((group.required,
+                       [positions[id(a)] for a in group._group_actions]))
+    for action in parser._actions:
+        fields.append(type(action).__name__)
+        subparsers = isinstance(action, argparse._SubParsersAction)
+        for attr, value in vars(action).items():
+            if attr not in _IGNORED_ATTRS and not (subparsers and
+                                                   attr == 'choices'):
+                fields.append((attr, _describe(value)))
+        if subparsers:
+            # only the listed commands matter
+            for choice in action._get_subactions():
+                fields.append((choice.dest, choice.metavar, choice.help))
+    return hashlib.sha1(
+        repr(fields).encode('utf-8', 'backslashreplace')).hexdigest()
+
+
+def _describe(value):
+    '''Return a representation of *value* which is the same in every
+    process, unlike the default repr() of objects with their address.'''
+    if value is None or type(value) in _SCALAR_TYPES:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    if isinstance(value, dict):
+        return sorted(value)
+    if hasattr(value, '__qualname__'):
+        return '{0}.{1}'.format(getattr(value, '__module__', ''),
+                                value.__qualname__)
+    return _ADDRESS_RE.sub('', repr(value))
+
+
+class _Deferred:
+    '''A parser to be created by *factory*, under all the *names*.'''
+
+    __slots__ = ('names', 'factory')
+
+    def __init__(self, names, factory):
+        self.names = names
+        self.factory = factory
+
+
+class ParserMap(dict):
+    '''The parsers of the commands, by name. A parser can be deferred with
+    :meth:`defer`, and is then created the first time it is looked up.'''
+
+    def defer(self, names, factory):
+        '''Defer the creation of the parser registered under *names* (the
+        name of the command and its aliases) to the first lookup.
+
+        :param names: A tuple of names.
+        :param factory: A callable without arguments returning the parser.'''
+        deferred = _Deferred(names, factory)
+        for name in names:
+            dict.__setitem__(self, name, deferred)
+
+    def __getitem__(self, name):
+        parser = dict.__getitem__(self, name)
+        if isinstance(parser, _Deferred):
+            deferred, parser = parser, parser.factory()
+            for name in deferred.names:
+                dict.__setitem__(self, name, parser)
+        return parser
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def is_built(self, name):
+        '''Whether the parser of *name* was already created.'''
+        return not isinstance(dict.__getitem__(self, name), _Deferred)
+
+
+class CommandsAction(argparse._SubParsersAction):
+    '''The action dispatching to the commands of a program. Commands can
+    belong to a group, given with the *group* argument of
+    :meth:`add_parser`.
+
+    If *max_listed* is given, the help lists first the commands without a
+    group and then one entry per group, up to *max_listed* entries, so that
+    formatting it takes time proportional to the number of listed entries
+    and not to the number of commands.
+
+    Parsers can also be built lazily, see :meth:`add_parser`. The aliases of
+    the commands are not choices of their own, but resolved to the name of
+    the command along with, if *prefixes* is true, the unambiguous prefixes
+    of the names and aliases.
+
+    :param max_listed: The maximum number of listed entries.
+    :param prefixes: Whether to accept prefixes of the commands.'''
+
+    def __init__(self, *args, max_listed=None, prefixes=False, **kwargs):
+        super(CommandsAction, self).__init__(*args, **kwargs)
+        self._name_parser_map = self.choices = ParserMap()
+        self.max_listed = max_listed
+        self.prefixes = prefixes
+        self._aliases = PrefixTrie()
+        # how to show the other commands, see show_help()
+        self.help_command = '{0} help'.format(self._prog_prefix)
+        if max_listed is not None and self.metavar is None:
+            self.metavar = 'COMMAND'
+        # the names of the commands, by group (None for no group)
+        self._groups = {}
+        self._summaries = {}
+        self._names = TrigramIndex()
+
+    def add_parser(self, name, group=None, build=None, **kwargs):
+        '''Add the parser of a command.
+
+        :param name: The name of the command.
+        :param group: The name of the group of the command, if any.
+        :param build: If given, the parser is only created when it is first
+            needed and then passed to this callable, which adds its
+            arguments. Nothing is returned.'''
+        aliases = tuple(kwargs.pop('aliases', ()))
+        for alias in (name,) + aliases:
+            if self._aliases.get(alias) is not None:
+                raise argparse.ArgumentError(
+                    self, 'conflicting subparser: {0}'.format(alias))
+        if build is None:
+            parser = super(CommandsAction, self).add_parser(name, **kwargs)
+        else:
+            parser = self._defer_parser(name, build, dict(kwargs))
+        if aliases and 'help' in kwargs:
+            # list the aliases along with the command
+            self._choices_actions[-1] = self._ChoicesPseudoAction(
+                name, aliases, kwargs['help'])
+        self._groups.setdefault(group, []).append(name)
+        self._summaries[name] = kwargs.get('help')
+        for alias in (name,) + aliases:
+            self._aliases.add(alias, name)
+            self._names.add(alias)
+        return parser
+
+    def resolve(self, name):
+        '''Return the name of the command *name* refers to, through an alias
+        or, if enabled, a prefix, or ``None`` if it matches no command. Raise
+        :class:`mando.suggest.AmbiguousPrefix` if it is the prefix of several
+        commands.'''
+        if self.prefixes:
+            return self._aliases.resolve(name)
+        return self._aliases.get(name)
+
+    def _defer_parser(self, name, build, kwargs):
+        # the same as _SubParsersAction.add_parser() without creating the
+        # parser
+        if kwargs.get('prog') is None:
+            kwargs['prog'] = '{0} {1}'.format(self._prog_prefix, name)
+        if 'help' in kwargs:
+            self._choices_actions.append(self._ChoicesPseudoAction(
+                name, (), kwargs.pop('help')))
+
+        def create():
+            parser = self._parser_class(**kwargs)
+            build(parser)
+            return parser
+        self._name_parser_map.defer((name,), create)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        super(CommandsAction, self).__call__(parser, namespace, values,
+                                             option_string)
+        # the innermost command, set first, is kept
+        if not hasattr(namespace, _COMMAND_PARSER):
+            setattr(namespace, _COMMAND_PARSER, self.choices[values[0]])
+
+    @property
+    def groups(self):
+        '''The names of the groups, in order of definition.'''
+        return [group for group in self._groups if group is not None]
+
+    def entries(self, group=None):
+        '''Yield the pairs ``(name, summary)`` of the commands of *group*
+        or, if not given, of the commands without a group and then of the
+        groups.'''
+        for name in self._groups.get(group, ()):
+            yield name, self._summaries[name]
+        if group is None:
+            for group, names in self._groups.items():
+                if group is not None:
+                    yield group, '{0} command{1}, see \'{2} {3}\''.format(
+                        len(names), 's' * (len(names) > 1), self.help_command,
+                        group)
+
+    def _get_subactions(self):
+        if self.max_listed is None:
+            return super(CommandsAction, self)._get_subactions()
+        entries = list(itertools.islice(self.entries(), self.max_listed + 1))
+        if len(entries) > self.max_listed:
+            more = (len(self._groups.get(None, ())) + len(self.groups) -
+                    self.max_listed + 1)
+            entries[self.max_listed - 1:] = [('...', '{0} more, see \'{1}\''
+                                              .format(more,
+                                                      self.help_command))]
+        return [self._ChoicesPseudoAction(name, (), summary)
+                for name, summary in entries]
+
+
+def show_help(parser, topics):
+    '''Return the help about *topics* in the program of *parser*: the
+    listing of all the commands and groups if *topics* is empty, or the
+    commands of a group, or the help of a command, a subprogram or a command
+    of a subprogram.
+
+    :param parser: The parser of the program.
+    :param topics: A sequence of names.'''
+    for index, topic in enumerate(topics):
+        action = _commands_action(parser)
+        if action is not None and topic in action.groups and \
+                index == len(topics) - 1:
+            return format_entries('commands in {0}:'.format(topic),
+                                  action.entries(topic))
+        if action is not None and topic not in action.choices:
+            try:
+                topic = action.resolve(topic) or topic
+            except AmbiguousPrefix as exc:
+                parser.error('ambiguous command: {0!r} could match {1}'.format(
+                    topic, ', '.join(map(repr, exc.candidates))))
+        if action is None or topic not in action.choices:
+            parser.error('unknown command or group: {0!r}'.format(topic))
+        parser = action.choices[topic]
+    action = _commands_action(parser)
+    if topics or action is None:
+        return parser.format_help()
+    return format_entries('commands:', action.entries())
+
+
+def _commands_action(parser):
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            return action
+    return None
+
+
+def format_entries(title, entries):
+    '''Format a listing of commands, given as pairs ``(name, summary)``.'''
+    entries = list(entries)
+    width = min(24, max([len(name) for name, _ in entries] or [0]))
+    lines = [title]
+    for name, summary in entries:
+        if summary is None or summary is argparse.SUPPRESS:
+            lines.append('  ' + name)
+        elif len(name) > width:
+            lines.append('  {0}\n  {1}  {2}'.format(name, ' ' * width,
+                                                    summary))
+        else:
+            lines.append('  {0:<{1}}  {2}'.format(name, width, summary))
+    return '\n'.join(lines) + '\n'
@@ -9,9 +9,16 @@
     :license: BSD, see LICENSE for details.
 """
 
+import collections
+
 from mando.napoleon.docstring import GoogleDocstring, NumpyDocstring
 
 
+Docstring = collections.namedtuple('Docstring',
+                                   'summary description parameters')
+Parameter = collections.namedtuple('Parameter', 'name type help')
+
+
 class Config:
     """Sphinx napoleon extension settings in `conf.py`.
 
@@ -39,6 +46,9 @@ class Config:
         napoleon_use_rtype = True
         napoleon_use_keyword = True
 
+    Unlike Sphinx's, these objects are immutable, so that a single instance
+    can be shared by all the docstrings of the same style.
+
     .. _Google style:
        http://google.github.io/styleguide/pyguide.html
     .. _NumPy style:
@@ -248,9 +258,59 @@ class Config:
         'napoleon_use_keyword': (True, 'env')
     }
 
+    __slots__ = tuple(_config_values)
+
     def __init__(self, **settings):
         # type: (Any) -> None
         for name, (default, rebuild) in self._config_values.items():
-            setattr(self, name, default)
+            object.__setattr__(self, name, default)
         for name, value in settings.items():
-            setattr(self, name, value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        # type: (unicode, Any) -> None
+        raise AttributeError('Config objects are immutable')
+
+    def __delattr__(self, name):
+        # type: (unicode) -> None
+        raise AttributeError('Config objects are immutable')
+
+
+DEFAULT_CONFIG = Config()
+CONFIGS = {
+    'numpy': Config(napoleon_google_docstring=False, napoleon_use_rtype=False),
+    'google': Config(napoleon_numpy_docstring=False, napoleon_use_rtype=False),
+}
+PARSERS = {
+    'numpy': NumpyDocstring,
+    'google': GoogleDocstring,
+}
+
+
+def parse_docstring(docstring, doctype):
+    """Parse a NumPy or Google style docstring into a :class:`Docstring`.
+
+    Unlike converting the docstring to reStructuredText, the parameters are
+    returned as they are found, without formatting them.
+
+    Parameters
+    ----------
+    docstring : :obj:`str`
+        The docstring to parse.
+    doctype : :obj:`str`
+        Either ``'numpy'`` or ``'google'``.
+
+    Returns
+    -------
+    Docstring
+        The summary (first paragraph), the description (the remaining text,
+        possibly empty) and the list of :class:`Parameter`, whose help is a
+        list of lines.
+
+    """
+    parsed = PARSERS[doctype](docstring, CONFIGS[doctype], structured=True)
+    parts = str(parsed).strip().split('\n\n', 1)
+    summary = parts[0].strip()
+    description = parts[1].strip() if len(parts) > 1 else ''
+    parameters = [Parameter(*field) for field in parsed.parameters()]
+    return Docstring(summary, description, parameters)
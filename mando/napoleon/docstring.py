@@ -11,10 +11,11 @@
 """
 
 from collections.abc import Callable
+from types import MappingProxyType
 import inspect
 import re
 
-from mando.napoleon.iterators import modify_iter
+from mando.napoleon.iterators import line_cursor
 from mando.napoleon.pycompat import UnicodeMixin
 
 
@@ -42,7 +43,7 @@ class GoogleDocstring(UnicodeMixin):
     config: :obj:`sphinx.ext.napoleon.Config` or :obj:`sphinx.config.Config`
         The configuration settings to use. If not given, defaults to the
         config object on `app`; or if `app` is not given defaults to the
-        a new :class:`sphinx.ext.napoleon.Config` object.
+        shared default :class:`mando.napoleon.Config` object.
 
 
     Other Parameters
@@ -62,6 +63,10 @@ class GoogleDocstring(UnicodeMixin):
         inherited_members, undoc_members, show_inheritance and noindex that
         are True if the flag option of same name was given to the auto
         directive.
+    structured : :obj:`bool`, optional
+        True to collect the parameters instead of formatting them and to skip
+        the formatting of the sections not needed by a command line
+        interface, see :meth:`parameters`. Defaults to False.
 
 
     Example
@@ -93,15 +98,57 @@ class GoogleDocstring(UnicodeMixin):
     <BLANKLINE>
 
     """
+    # Sections feeding the command line interface: when parsing a structured
+    # docstring, the other ones are kept verbatim instead of being formatted
+    _structured_sections = frozenset([
+        'args', 'arguments', 'keyword args', 'keyword arguments',
+        'other parameters', 'parameters', 'return', 'returns',
+    ])
+    # Section names mapped to the name of the method parsing them, looked up
+    # on the instance so that subclasses can override the methods
+    _sections = MappingProxyType({
+        'args': '_parse_parameters_section',
+        'arguments': '_parse_parameters_section',
+        'attributes': '_parse_attributes_section',
+        'example': '_parse_examples_section',
+        'examples': '_parse_examples_section',
+        'keyword args': '_parse_keyword_arguments_section',
+        'keyword arguments': '_parse_keyword_arguments_section',
+        'methods': '_parse_methods_section',
+        'note': '_parse_note_section',
+        'notes': '_parse_notes_section',
+        'other parameters': '_parse_other_parameters_section',
+        'parameters': '_parse_parameters_section',
+        'return': '_parse_returns_section',
+        'returns': '_parse_returns_section',
+        'raises': '_parse_raises_section',
+        'references': '_parse_references_section',
+        'see also': '_parse_see_also_section',
+        'todo': '_parse_todo_section',
+        'warning': '_parse_warning_section',
+        'warnings': '_parse_warning_section',
+        'warns': '_parse_warns_section',
+        'yield': '_parse_yields_section',
+        'yields': '_parse_yields_section',
+    })  # type: Mapping[unicode, unicode]
+    _directive_sections = ()  # type: Tuple[unicode, ...]
+
+    __slots__ = ('_config', '_app', '_structured', '_parameters', '_what',
+                 '_name', '_obj', '_opt', '_lines', '_line_iter',
+                 '_parsed_lines', '_is_in_section', '_section_indent',
+                 '_headers')
+
     def __init__(self, docstring, config=None, app=None, what='', name='',
-                 obj=None, options=None):
-        # type: (Union[unicode, List[unicode]], SphinxConfig, Sphinx, unicode, unicode, Any, Any) -> None  # NOQA
+                 obj=None, options=None, structured=False):
+        # type: (Union[unicode, List[unicode]], SphinxConfig, Sphinx, unicode, unicode, Any, Any, bool) -> None  # NOQA
         self._config = config
         self._app = app
+        self._structured = structured
+        self._parameters = []  # type: List[Tuple[unicode, unicode, List[unicode]]]  # NOQA
 
         if not self._config:
-            from sphinx.ext.napoleon import Config
-            self._config = self._app and self._app.config or Config()  # type: ignore
+            from mando.napoleon import DEFAULT_CONFIG
+            self._config = self._app and self._app.config or DEFAULT_CONFIG  # type: ignore  # NOQA
 
         if not what:
             if inspect.isclass(obj):
@@ -120,38 +167,13 @@ class GoogleDocstring(UnicodeMixin):
         if isinstance(docstring, str):
             docstring = docstring.splitlines()
         self._lines = docstring
-        self._line_iter = modify_iter(docstring, modifier=lambda s: s.rstrip())
+        self._line_iter = line_cursor(docstring)
         self._parsed_lines = []  # type: List[unicode]
         self._is_in_section = False
         self._section_indent = 0
-        if not hasattr(self, '_directive_sections'):
-            self._directive_sections = []  # type: List[unicode]
-        if not hasattr(self, '_sections'):
-            self._sections = {
-                'args': self._parse_parameters_section,
-                'arguments': self._parse_parameters_section,
-                'attributes': self._parse_attributes_section,
-                'example': self._parse_examples_section,
-                'examples': self._parse_examples_section,
-                'keyword args': self._parse_keyword_arguments_section,
-                'keyword arguments': self._parse_keyword_arguments_section,
-                'methods': self._parse_methods_section,
-                'note': self._parse_note_section,
-                'notes': self._parse_notes_section,
-                'other parameters': self._parse_other_parameters_section,
-                'parameters': self._parse_parameters_section,
-                'return': self._parse_returns_section,
-                'returns': self._parse_returns_section,
-                'raises': self._parse_raises_section,
-                'references': self._parse_references_section,
-                'see also': self._parse_see_also_section,
-                'todo': self._parse_todo_section,
-                'warning': self._parse_warning_section,
-                'warnings': self._parse_warning_section,
-                'warns': self._parse_warns_section,
-                'yield': self._parse_yields_section,
-                'yields': self._parse_yields_section,
-            }  # type: Dict[unicode, Callable]
+        self._headers = bytearray(
+            self._is_section_header_at(i)
+            for i in range(len(self._line_iter.lines)))
         self._parse()
 
     def __unicode__(self):
@@ -178,32 +200,66 @@ class GoogleDocstring(UnicodeMixin):
         """
         return self._parsed_lines
 
+    def parameters(self):
+        # type: () -> List[Tuple[unicode, unicode, List[unicode]]]
+        """Return the parameters of a structured docstring.
+
+        When the docstring is parsed with ``structured=True``, the Parameters,
+        Keyword Arguments and Other Parameters sections are collected instead
+        of being formatted, and the Returns section is dropped. The other
+        sections, which are not needed to build a command line interface,
+        are kept verbatim without being formatted.
+
+        Returns
+        -------
+        list(tuple)
+            The ``(name, type, description lines)`` of each parameter, in
+            order. Names and descriptions are not escaped nor formatted.
+
+        """
+        return self._parameters
+
+    def _collect_parameters(self, fields):
+        # type: (List[Tuple[unicode, unicode, List[unicode]]]) -> List[unicode]
+        for _name, _type, _desc in fields:
+            self._parameters.append((_name.lstrip('\\*'), _type,
+                                     self._strip_empty(_desc)))
+        return self._section_separator()
+
+    def _section_separator(self):
+        # type: () -> List[unicode]
+        # a collected section leaves a blank line, as a formatted one does,
+        # so that the text before and after it are not merged
+        if self._parsed_lines and self._parsed_lines[-1]:
+            return ['']
+        return []
+
     def _consume_indented_block(self, indent=1):
         # type: (int) -> List[unicode]
         lines = []
-        line = self._line_iter.peek()
+        cursor = self._line_iter
         while(not self._is_section_break() and
-              (not line or self._is_indented(line, indent))):
-            lines.append(next(self._line_iter))  # type: ignore
-            line = self._line_iter.peek()
+              (cursor.blank[cursor.index] or
+               cursor.indents[cursor.index] >= indent)):
+            lines.append(next(cursor))  # type: ignore
         return lines
 
     def _consume_contiguous(self):
         # type: () -> List[unicode]
         lines = []
-        while (self._line_iter.has_next() and
-               self._line_iter.peek() and
-               not self._is_section_header()):
-            lines.append(next(self._line_iter))  # type: ignore
+        cursor = self._line_iter
+        while (cursor.has_next() and
+               not cursor.blank[cursor.index] and
+               not self._headers[cursor.index]):
+            lines.append(next(cursor))  # type: ignore
         return lines
 
     def _consume_empty(self):
         # type: () -> List[unicode]
         lines = []
-        line = self._line_iter.peek()
-        while self._line_iter.has_next() and not line:
-            lines.append(next(self._line_iter))  # type: ignore
-            line = self._line_iter.peek()
+        cursor = self._line_iter
+        while cursor.has_next() and cursor.blank[cursor.index]:
+            lines.append(next(cursor))  # type: ignore
         return lines
 
     def _consume_field(self, parse_type=True, prefer_type=False):
@@ -225,7 +281,8 @@ class GoogleDocstring(UnicodeMixin):
             _type, _name = _name, _type
         indent = self._get_indent(line) + 1
         _descs = [_desc] + self._dedent(self._consume_indented_block(indent))
-        _descs = self.__class__(_descs, self._config).lines()
+        if not self._structured:
+            _descs = self.__class__(_descs, self._config).lines()
         return _name, _type, _descs
 
     def _consume_fields(self, parse_type=True, prefer_type=False):
@@ -423,13 +480,9 @@ class GoogleDocstring(UnicodeMixin):
 
     def _get_current_indent(self, peek_ahead=0):
         # type: (int) -> int
-        line = self._line_iter.peek(peek_ahead + 1)[peek_ahead]
-        while line != self._line_iter.sentinel:
-            if line:
-                return self._get_indent(line)
-            peek_ahead += 1
-            line = self._line_iter.peek(peek_ahead + 1)[peek_ahead]
-        return 0
+        cursor = self._line_iter
+        index = min(cursor.index + peek_ahead, len(cursor.lines))
+        return cursor.next_indents[index]
 
     def _get_indent(self, line):
         # type: (unicode) -> int
@@ -490,27 +543,38 @@ class GoogleDocstring(UnicodeMixin):
 
     def _is_section_header(self):
         # type: () -> bool
-        section = self._line_iter.peek().lower()
+        return bool(self._headers[self._line_iter.index])
+
+    def _is_section_header_at(self, index):
+        # type: (int) -> bool
+        cursor = self._line_iter
+        section = cursor.lines[index].lower()
         match = _google_section_regex.match(section)
         if match and section.strip(':') in self._sections:
-            header_indent = self._get_indent(section)
-            section_indent = self._get_current_indent(peek_ahead=1)
+            header_indent = cursor.indents[index]
+            section_indent = cursor.next_indents[index + 1]
             return section_indent > header_indent
         elif self._directive_sections:
-            if _directive_regex.match(section):
-                for directive_section in self._directive_sections:
-                    if section.startswith(directive_section):
-                        return True
+            return self._is_directive_section(section)
+        return False
+
+    def _is_directive_section(self, section):
+        # type: (unicode) -> bool
+        if _directive_regex.match(section):
+            for directive_section in self._directive_sections:
+                if section.startswith(directive_section):
+                    return True
         return False
 
     def _is_section_break(self):
         # type: () -> bool
-        line = self._line_iter.peek()
-        return (not self._line_iter.has_next() or
-                self._is_section_header() or
+        cursor = self._line_iter
+        index = cursor.index
+        return (index >= len(cursor.lines) or
+                self._headers[index] or
                 (self._is_in_section and
-                    line and
-                    not self._is_indented(line, self._section_indent)))
+                    not cursor.blank[index] and
+                    cursor.indents[index] < self._section_indent))
 
     def _parse(self):
         # type: () -> None
@@ -528,8 +592,12 @@ class GoogleDocstring(UnicodeMixin):
                     self._section_indent = self._get_current_indent()
                     if _directive_regex.match(section):  # type: ignore
                         lines = [section] + self._consume_to_next_section()
+                    elif (self._structured and
+                          section.lower() not in self._structured_sections):
+                        lines = self._parse_verbatim_section(section)
                     else:
-                        lines = self._sections[section.lower()](section)
+                        method = self._sections[section.lower()]
+                        lines = getattr(self, method)(section)
                 finally:
                     self._is_in_section = False
                     self._section_indent = 0
@@ -593,6 +661,8 @@ class GoogleDocstring(UnicodeMixin):
     def _parse_keyword_arguments_section(self, section):
         # type: (unicode) -> List[unicode]
         fields = self._consume_fields()
+        if self._structured:
+            return self._collect_parameters(fields)
         if self._config.napoleon_use_keyword:
             return self._format_docutils_params(
                 fields,
@@ -623,11 +693,27 @@ class GoogleDocstring(UnicodeMixin):
 
     def _parse_other_parameters_section(self, section):
         # type: (unicode) -> List[unicode]
-        return self._format_fields('Other Parameters', self._consume_fields())
+        fields = self._consume_fields()
+        if self._structured:
+            return self._collect_parameters(fields)
+        return self._format_fields('Other Parameters', fields)
+
+    def _parse_verbatim_section(self, section):
+        # type: (unicode) -> List[unicode]
+        lines = self._format_verbatim_header(section) + self._consume_empty()
+        while not self._is_section_break():
+            lines.append(next(self._line_iter))  # type: ignore
+        return lines + self._consume_empty()
+
+    def _format_verbatim_header(self, section):
+        # type: (unicode) -> List[unicode]
+        return [section + ':']
 
     def _parse_parameters_section(self, section):
         # type: (unicode) -> List[unicode]
         fields = self._consume_fields()
+        if self._structured:
+            return self._collect_parameters(fields)
         if self._config.napoleon_use_param:
             return self._format_docutils_params(fields)
         else:
@@ -680,6 +766,8 @@ class GoogleDocstring(UnicodeMixin):
     def _parse_returns_section(self, section):
         # type: (unicode) -> List[unicode]
         fields = self._consume_returns_section()
+        if self._structured:
+            return self._section_separator()
         multi = len(fields) > 1
         if multi:
             use_rtype = False
@@ -785,7 +873,7 @@ class NumpyDocstring(GoogleDocstring):
     config: :obj:`sphinx.ext.napoleon.Config` or :obj:`sphinx.config.Config`
         The configuration settings to use. If not given, defaults to the
         config object on `app`; or if `app` is not given defaults to the
-        a new :class:`sphinx.ext.napoleon.Config` object.
+        shared default :class:`mando.napoleon.Config` object.
 
 
     Other Parameters
@@ -805,6 +893,10 @@ class NumpyDocstring(GoogleDocstring):
         inherited_members, undoc_members, show_inheritance and noindex that
         are True if the flag option of same name was given to the auto
         directive.
+    structured : :obj:`bool`, optional
+        True to collect the parameters instead of formatting them and to skip
+        the formatting of the sections not needed by a command line
+        interface, see :meth:`parameters`. Defaults to False.
 
 
     Example
@@ -867,12 +959,9 @@ class NumpyDocstring(GoogleDocstring):
             The lines of the docstring in a list.
 
     """
-    def __init__(self, docstring, config=None, app=None, what='', name='',
-                 obj=None, options=None):
-        # type: (Union[unicode, List[unicode]], SphinxConfig, Sphinx, unicode, unicode, Any, Any) -> None  # NOQA
-        self._directive_sections = ['.. index::']
-        super(NumpyDocstring, self).__init__(docstring, config, app, what,
-                                             name, obj, options)
+    _directive_sections = ('.. index::',)
+
+    __slots__ = ()
 
     def _consume_field(self, parse_type=True, prefer_type=False):
         # type: (bool, bool) -> Tuple[unicode, unicode, List[unicode]]
@@ -888,7 +977,8 @@ class NumpyDocstring(GoogleDocstring):
             _type, _name = _name, _type
         indent = self._get_indent(line) + 1
         _desc = self._dedent(self._consume_indented_block(indent))
-        _desc = self.__class__(_desc, self._config).lines()
+        if not self._structured:
+            _desc = self.__class__(_desc, self._config).lines()
         return _name, _type, _desc
 
     def _consume_returns_section(self):
@@ -903,27 +993,30 @@ class NumpyDocstring(GoogleDocstring):
             next(self._line_iter)  # type: ignore
         return section
 
+    def _format_verbatim_header(self, section):
+        # type: (unicode) -> List[unicode]
+        return [section, '-' * len(section)]
+
     def _is_section_break(self):
         # type: () -> bool
-        line1, line2 = self._line_iter.peek(2)
-        return (not self._line_iter.has_next() or
-                self._is_section_header() or
-                ['', ''] == [line1, line2] or
+        cursor = self._line_iter
+        index = cursor.index
+        return (index >= len(cursor.lines) or
+                self._headers[index] or
+                (cursor.blank[index] and index + 1 < len(cursor.lines) and
+                    cursor.blank[index + 1]) or
                 (self._is_in_section and
-                    line1 and
-                    not self._is_indented(line1, self._section_indent)))
-
-    def _is_section_header(self):
-        # type: () -> bool
-        section, underline = self._line_iter.peek(2)
-        section = section.lower()
-        if section in self._sections and isinstance(underline, str):
-            return bool(_numpy_section_regex.match(underline))  # type: ignore
+                    not cursor.blank[index] and
+                    cursor.indents[index] < self._section_indent))
+
+    def _is_section_header_at(self, index):
+        # type: (int) -> bool
+        lines = self._line_iter.lines
+        section = lines[index].lower()
+        if section in self._sections and index + 1 < len(lines):
+            return bool(_numpy_section_regex.match(lines[index + 1]))  # type: ignore  # NOQA
         elif self._directive_sections:
-            if _directive_regex.match(section):
-                for directive_section in self._directive_sections:
-                    if section.startswith(directive_section):
-                        return True
+            return self._is_directive_section(section)
         return False
 
     _name_rgx = re.compile(r"^\s*(:(?P<role>\w+):`(?P<name>[a-zA-Z0-9_.-]+)`|"
@@ -11,6 +11,7 @@
     :license: BSD, see LICENSE for details.
 """
 
+from array import array
 import collections
 
 
@@ -246,3 +247,85 @@ class modify_iter(peek_iter):
         except StopIteration:
             while len(self._cache) < n:
                 self._cache.append(self.sentinel)
+
+
+class line_cursor:
+    """A cursor over a list of lines, classified once when it is created.
+
+    Lines are right-stripped, and for each one the cursor records whether it
+    is blank, its indentation and the indentation of the first non blank line
+    starting from it, in compact arrays indexed by line number. Parsers can
+    then look ahead by index instead of peeking into an iterator.
+
+    `line_cursor` supports the same protocol of :class:`modify_iter` when
+    used with ``modifier=lambda s: s.rstrip()``.
+
+    Parameters
+    ----------
+    lines : list of str
+        The lines to iterate over.
+
+    Attributes
+    ----------
+    index : int
+        The index of the next line.
+    lines : list of str
+        The right-stripped lines.
+    blank : bytearray
+        1 for the lines which are empty.
+    indents : array
+        The indentation of each line. Empty lines have no indentation.
+    next_indents : array
+        The indentation of the first non-empty line at or after each index,
+        with an extra trailing 0.
+    sentinel
+        The value returned by `peek` past the last line.
+
+    """
+    __slots__ = ('lines', 'blank', 'indents', 'next_indents', 'index',
+                 'sentinel')
+
+    def __init__(self, lines):
+        # type: (List[unicode]) -> None
+        self.lines = lines = [line.rstrip() for line in lines]
+        self.blank = bytearray(not line for line in lines)
+        self.indents = array('l', [len(line) - len(line.lstrip())
+                                   for line in lines])
+        self.next_indents = next_indents = array('l', [0]) * (len(lines) + 1)
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i]:
+                next_indents[i] = self.indents[i]
+            else:
+                next_indents[i] = next_indents[i + 1]
+        self.index = 0
+        self.sentinel = object()
+
+    def __iter__(self):
+        # type: () -> line_cursor
+        return self
+
+    def __next__(self):
+        # type: () -> unicode
+        index = self.index
+        if index >= len(self.lines):
+            raise StopIteration
+        self.index = index + 1
+        return self.lines[index]
+
+    next = __next__
+
+    def has_next(self):
+        # type: () -> bool
+        """Determine if the cursor is past the last line."""
+        return self.index < len(self.lines)
+
+    def peek(self, n=None):
+        # type: (int) -> Any
+        """Preview the next line or the next `n` lines, padded with
+        `sentinel`, without advancing the cursor."""
+        if n is None:
+            if self.index < len(self.lines):
+                return self.lines[self.index]
+            return self.sentinel
+        items = self.lines[self.index:self.index + n]
+        return items + [self.sentinel] * (n - len(items))
@@ -1,32 +1,136 @@
+'''Help formatters interpreting reStructuredText.
+
+:class:`RSTHelpFormatter` renders the subset of reST found in the help of
+commands directly to ANSI escape sequences: emphasis, strong emphasis,
+inline literals and roles, bullet and enumerated lists, literal blocks and
+field lists. :class:`RST2ANSIHelpFormatter` uses instead the ``rst2ansi``
+package, built on docutils, which must be installed separately.'''
 
 import argparse
+import re
 import sys
 
-from rst2ansi import rst2ansi
+
+# The escape sequences starting and ending each style
+STYLES = {
+    'strong': ('\x1b[1m', '\x1b[22m'),
+    'emphasis': ('\x1b[3m', '\x1b[23m'),
+    'literal': ('\x1b[4m', '\x1b[24m'),
+}
+
+_INLINE_RE = re.compile(
+    r'(?<![\w*`])(?:'
+    r'\*\*(?P<strong>[^\s*](?:.*?[^\s*])?)\*\*|'
+    r'\*(?P<emphasis>[^\s*](?:[^*]*?[^\s*])?)\*|'
+    r'``(?P<literal>[^\s`](?:.*?[^\s`])?)``|'
+    r':[\w.+-]+:`(?P<role>[^\s`](?:[^`]*?[^\s`])?)`|'
+    r'`(?P<interpreted>[^\s`](?:[^`]*?[^\s`])?)`'
+    r')(?![\w*`])')
+# The styles of the groups of _INLINE_RE
+_INLINE_STYLES = {
+    'strong': 'strong',
+    'emphasis': 'emphasis',
+    'literal': 'literal',
+    'role': 'literal',
+    'interpreted': 'emphasis',
+}
+_BULLET_RE = re.compile(r'^(\s*)[*+-](\s+)(?=\S)')
+_ENUMERATED_RE = re.compile(r'^(\s*)(\d+|#)([.)])(\s+)(?=\S)')
+_FIELD_RE = re.compile(r'^(\s*):([^:`\s][^:`]*):(\s+|$)')
+
+
+def render(text, encoding=None):
+    '''Render the reStructuredText markup of *text* with ANSI escape
+    sequences.
+
+    :param text: The text to render.
+    :param encoding: The encoding of the output, by default the one of
+        ``sys.stdout``, used to choose the bullet of lists.'''
+    encoding = encoding or getattr(sys.stdout, 'encoding', None) or 'ascii'
+    bullet = _bullet(encoding)
+    lines = []
+    # the indentation of the paragraph introducing the current literal block
+    literal_indent = None
+    counters = {}
+    for line in text.split('\n'):
+        stripped = line.lstrip()
+        indent = len(line) - len(stripped)
+        if literal_indent is not None:
+            if not stripped or indent > literal_indent:
+                lines.append(line)
+                continue
+            literal_indent = None
+        if not stripped:
+            counters.clear()
+            lines.append(line)
+            continue
+        if stripped.endswith('::'):
+            literal_indent = indent
+            line = line[:-2].rstrip()
+            if line.strip():
+                line += ':'
+            else:
+                # a lone '::' marker vanishes along with the blank line
+                # separating it from the previous paragraph
+                if lines and not lines[-1].strip():
+                    lines.pop()
+                continue
+        line = _BULLET_RE.sub(r'\1{0}\2'.format(bullet), line, 1)
+        line = _ENUMERATED_RE.sub(lambda m: _number(m, counters), line, 1)
+        line = _FIELD_RE.sub(_field, line, 1)
+        lines.append(_INLINE_RE.sub(_inline, line))
+    return '\n'.join(lines)
+
+
+def _bullet(encoding):
+    try:
+        '•'.encode(encoding)
+    except (UnicodeEncodeError, LookupError):
+        return '*'
+    return '•'
+
+
+def _number(match, counters):
+    indent, number, suffix, space = match.groups()
+    if number == '#':
+        number = str(counters.get(len(indent), 0) + 1)
+    counters[len(indent)] = int(number)
+    return '{0}{1}{2}{3}'.format(indent, number, suffix, space)
 
 
-def b(s):
-    # Useful for very coarse version differentiation.
-    PY2 = sys.version_info[0] == 2
-    PY3 = sys.version_info[0] == 3
-    if PY3:
-        return s.encode("utf-8")
-    else:
-        return s
+def _field(match):
+    start, end = STYLES['strong']
+    return '{0}{1}{2}:{3}'.format(match.group(1), start,
+                                  match.group(2), end) + match.group(3)
+
+
+def _inline(match):
+    start, end = STYLES[_INLINE_STYLES[match.lastgroup]]
+    return start + match.group(match.lastgroup) + end
+
+
+def rst2ansi(text):
+    '''Render *text* with the ``rst2ansi`` package, imported on first use.'''
+    from rst2ansi import rst2ansi as convert
+
+    encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+    ret = convert(text.encode('utf-8') + b'\n')
+    return ret.encode(encoding, 'replace').decode(encoding)
 
 
 class RSTHelpFormatter(argparse.RawTextHelpFormatter):
     """
     Custom formatter class that is capable of interpreting ReST.
     """
+    renderer = staticmethod(render)
+
     def format_help(self):
-        ret = rst2ansi(b(super(RSTHelpFormatter, self).format_help()) +
-                       b('\n'))
-        return ret.encode(sys.stdout.encoding,
-                          'replace').decode(sys.stdout.encoding)
-
-    def format_usage(self):
-        ret = rst2ansi(b(super(RSTHelpFormatter, self).format_usage()) +
-                       b('\n'))
-        return ret.encode(sys.stdout.encoding,
-                          'replace').decode(sys.stdout.encoding)
+        # also used by ArgumentParser.format_usage()
+        return self.renderer(super(RSTHelpFormatter, self).format_help())
+
+
+class RST2ANSIHelpFormatter(RSTHelpFormatter):
+    """
+    Formatter class interpreting ReST with the rst2ansi package.
+    """
+    renderer = staticmethod(rst2ansi)
@@ -0,0 +1,221 @@
+'''Search of the commands of a program, behind ``help --search``.
+
+An inverted index maps the words found in the names, summaries and
+descriptions of the commands and in the names and help of their parameters
+to the commands, with a weight depending on where they were found. It is
+built from the specs of the commands, without building their parsers, and
+kept along with a fingerprint of the specs, in memory and, for programs with
+a ``help_cache_dir``, in a file of that directory, so that it is only built
+again when the commands change.'''
+
+import argparse
+import bisect
+import gc
+import glob
+import hashlib
+import heapq
+import itertools
+import marshal
+import math
+import os
+import re
+
+from mando.utils import CACHE_VERSION, write_atomic
+
+
+_WORD_RE = re.compile(r'[^\W_]+')
+# The weight of the words found in each part of a command
+WEIGHTS = {
+    'name': 8,
+    'summary': 4,
+    'param': 2,
+    'description': 1,
+}
+
+
+def tokenize(text):
+    '''Return the lowercase words of *text*.'''
+    return _WORD_RE.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    '''An inverted index of the commands of a program.
+
+    :param program: The :class:`mando.core.Program`, or a subprogram.
+    :param items: The entries of the program, if already known, see
+        :func:`entries`.'''
+
+    def __init__(self, program=None, items=None):
+        # the path of the command and its summary, by document number
+        self.documents = []
+        self._postings = {}
+        if items is None:
+            items = entries(program)
+        for path, summary, group, description, params in items:
+            doc = len(self.documents)
+            self.documents.append((path, summary))
+            self._add(doc, 'name', ' '.join(path))
+            self._add(doc, 'name', group)
+            self._add(doc, 'summary', summary)
+            self._add(doc, 'description', description)
+            for names, help in params:
+                self._add(doc, 'param', names)
+                self._add(doc, 'param', help)
+        self._vocabulary = sorted(self._postings)
+
+    def to_dict(self):
+        '''Return the index as a dictionary of builtin types, which can be
+        serialized with :py:mod:`marshal`.'''
+        return {'documents': self.documents, 'postings': self._postings}
+
+    @classmethod
+    def from_dict(cls, data):
+        '''Return the index represented by *data*, see :meth:`to_dict`.'''
+        index = cls(items=())
+        index.documents = data['documents']
+        index._postings = data['postings']
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    def _add(self, doc, field, text):
+        weight = WEIGHTS[field]
+        for word in tokenize(text):
+            postings = self._postings.setdefault(word, {})
+            postings[doc] = postings.get(doc, 0) + weight
+
+    def _matches(self, word):
+        '''Merge the postings of the words starting with *word*. Exact
+        matches weigh twice as much.'''
+        matches = {}
+        start = bisect.bisect_left(self._vocabulary, word)
+        for term in itertools.islice(self._vocabulary, start, None):
+            if not term.startswith(word):
+                break
+            postings = self._postings[term]
+            idf = math.log(1 + len(self.documents) / len(postings))
+            factor = idf * (2 if term == word else 1)
+            for doc, weight in postings.items():
+                matches[doc] = max(matches.get(doc, 0), weight * factor)
+        return matches
+
+    def search(self, query, limit=20):
+        '''Return the list of the ``(path, summary)`` of the commands matching
+        all the words of *query*, best matches first. Words also match as
+        prefixes.
+
+        :param query: The words to search.
+        :param limit: The maximum number of results.'''
+        scores = None
+        for word in tokenize(query):
+            matches = self._matches(word)
+            if scores is None:
+                scores = matches
+            else:
+                scores = dict((doc, score + matches[doc])
+                              for doc, score in scores.items()
+                              if doc in matches)
+        # ties are broken by the order of definition of the commands
+        ranked = heapq.nsmallest(limit, (scores or {}).items(),
+                                 key=lambda item: (-item[1], item[0]))
+        return [self.documents[doc] for doc, _ in ranked]
+
+
+def entries(program, path=()):
+    '''Yield the ``(path, summary, group, description, params)`` of the
+    commands and subprograms of *program*, read from their specs without
+    building their parsers, where ``params`` is a list of pairs
+    ``(option strings, help)``. The commands and subprograms which are not
+    loaded yet, like plugins, only have a name and a summary.'''
+    action = program._subparsers
+    summaries = getattr(action, '_summaries', {})
+    groups = dict((name, group) for group, names in
+                  getattr(action, '_groups', {}).items() for name in names)
+    # iterating over the choices does not build the parsers
+    for name in action.choices:
+        sub_path = path + (name,)
+        summary = summaries.get(name)
+        spec = program.commands.get(name)
+        sub = program.subprograms.get(name)
+        if spec is not None:
+            params = spec.params + tuple(param for group in spec.options
+                                         for param in group.params)
+            params = [(' '.join(param.args), param.kwargs.get('help'))
+                      for param in params
+                      if param.kwargs.get('help') is not argparse.SUPPRESS]
+            yield sub_path, summary, groups.get(name), spec.description, \
+                params
+        elif sub is not None:
+            yield sub_path, summary, groups.get(name), \
+                sub.parser.description, []
+            yield from entries(sub, sub_path)
+        else:
+            yield sub_path, summary, groups.get(name), None, []
+
+
+def fingerprint(items):
+    '''Return a digest of the entries of a program, see :func:`entries`.'''
+    return hashlib.sha1(repr(items).encode('utf-8',
+                                           'backslashreplace')).hexdigest()
+
+
+def search(program, query, limit=20):
+    '''Search the commands of *program*, building the index only if the
+    commands changed since the last search. See :meth:`SearchIndex.search`.'''
+    items = list(entries(program))
+    digest = fingerprint(items)
+    cached = getattr(program, '_search_index', None)
+    if cached is None or cached[0] != digest:
+        help_cache = getattr(program.parser, 'help_cache', None)
+        directory = help_cache.directory if help_cache is not None else None
+        name = hashlib.sha1(program.parser.prog.encode(
+            'utf-8', 'backslashreplace')).hexdigest()[:12]
+        index = _load(directory, name, digest)
+        if index is None:
+            index = SearchIndex(items=items)
+            _store(directory, name, digest, index)
+        cached = program._search_index = (digest, index)
+    return cached[1].search(query, limit)
+
+
+def _path(directory, name, digest):
+    # the format of marshal depends on the version of Python
+    return os.path.join(directory, 'search-{0}-{1}-{2}-{3}.bin'.format(
+        name, CACHE_VERSION, marshal.version, digest))
+
+
+def _load(directory, name, digest):
+    if directory is None:
+        return None
+    try:
+        with open(_path(directory, name, digest), 'rb') as fobj:
+            data = fobj.read()
+    except OSError:
+        return None
+    # the many objects created would trigger full collections, which are
+    # slow in large programs and find nothing to collect
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return SearchIndex.from_dict(marshal.loads(data))
+    except (EOFError, ValueError, KeyError, TypeError):
+        return None
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _store(directory, name, digest, index):
+    '''Store *index* in *directory*, removing the indexes of the other
+    versions of the program *name*.'''
+    if directory is None:
+        return
+    path = _path(directory, name, digest)
+    if not write_atomic(path, marshal.dumps(index.to_dict())):
+        return
+    for other in glob.glob(os.path.join(
+            directory, 'search-{0}-*.bin'.format(name))):
+        if other != path:
+            try:
+                os.remove(other)
+            except OSError:
+                pass
@@ -0,0 +1,185 @@
+'''The description of the commands of a program, independent of argparse.
+
+Registering a function produces a :class:`CommandSpec`, holding one
+:class:`ParamSpec` per parameter. The parser of a command is built from it
+only when it is needed, which is when the command runs or its help is shown,
+so that a program with many commands does not keep thousands of argparse
+objects around. The specs are listed by the ``commands`` attribute of programs
+and subprograms, and :meth:`mando.core.SubProgram.walk` yields those of the
+whole tree::
+
+    for path, spec in program.walk():
+        print(' '.join(path), spec.help)
+        for param in spec.params:
+            print('   ', param.args, param.kwargs)'''
+
+import sys
+
+from mando.utils import iter_delimited
+
+
+# The value of a variadic parameter standing for stdin
+STDIN_MARKER = '-'
+
+
+class ParamSpec:
+    '''A parameter of a command.
+
+    :param name: The name of the parameter in the function.
+    :param args: The positional arguments of ``add_argument()``: the name of
+        the parameter or its option strings.
+    :param kwargs: The keyword arguments of ``add_argument()``.
+    :param completer: The argcomplete completer of the parameter, if any.'''
+
+    __slots__ = ('name', 'args', 'kwargs', 'completer')
+
+    def __init__(self, name, args, kwargs, completer=None):
+        self.name = name
+        self.args = tuple(args)
+        self.kwargs = kwargs
+        self.completer = completer
+
+    def __repr__(self):
+        return 'ParamSpec({0!r}, {1!r}, {2!r})'.format(self.name, self.args,
+                                                       self.kwargs)
+
+    @property
+    def positional(self):
+        '''Whether the parameter is given without an option string.'''
+        return not self.args[0].startswith('-')
+
+    def add_to(self, parser):
+        '''Add the argument to *parser* and return its action.'''
+        action = parser.add_argument(*self.args, **self.kwargs)
+        if self.completer is not None:
+            action.completer = self.completer
+        return action
+
+
+class OptionGroup:
+    '''Options shared by several commands, such as ``--verbose``. They are
+    declared once and only added to the parser of a command when it is built,
+    so that they cost nothing to the commands which do not run. Their values
+    are attributes of the program, as the ones of its global options.
+
+    :param title: The title of the options in the help. If not given, they
+        are listed with the other options of the commands.
+    :param description: The description of the options in the help.'''
+
+    __slots__ = ('title', 'description', 'params')
+
+    def __init__(self, title=None, description=None):
+        self.title = title
+        self.description = description
+        self.params = []
+
+    def __repr__(self):
+        return 'OptionGroup({0!r})'.format(self.title)
+
+    def option(self, *args, **kwargs):
+        '''Add an option, with the arguments of ``add_argument()`` and an
+        optional *completer*. Return its :class:`ParamSpec`.'''
+        assert args and all(arg.startswith('-') for arg in args), \
+            "Positional arguments not supported here"
+        completer = kwargs.pop('completer', None)
+        dest = kwargs.get('dest') or next(
+            (arg for arg in args if arg.startswith('--')), args[0])
+        param = ParamSpec(dest.lstrip('-').replace('-', '_'), args, kwargs,
+                          completer)
+        self.params.append(param)
+        return param
+
+    def add_to(self, parser, exclude=()):
+        '''Add the options to *parser*, except the ones named in *exclude*.
+        The option strings already used by *parser* are left out, so that
+        those of the command win, and so is an option with none left.'''
+        container = parser
+        if self.title is not None:
+            container = parser.add_argument_group(self.title,
+                                                  self.description)
+        taken = parser._option_string_actions
+        for param in self.params:
+            if param.name in exclude:
+                continue
+            args = [arg for arg in param.args if arg not in taken]
+            if not args:
+                continue
+            if len(args) < len(param.args):
+                param = ParamSpec(param.name, args,
+                                  dict(param.kwargs, dest=param.name),
+                                  param.completer)
+            param.add_to(container)
+
+
+class CommandSpec:
+    '''A command: the function it runs, the signature binding the parsed
+    arguments to it and its parameters.
+
+    :param name: The name of the command.
+    :param function: The function run by the command.
+    :param signature: The :py:class:`inspect.Signature` of the function.
+    :param help: The summary of the command, if any.
+    :param description: The description of the command, if any.
+    :param params: The :class:`ParamSpec` of the parameters.
+    :param stdin_from: The parameter read from stdin when it is not given,
+        if any.
+    :param options: The :class:`OptionGroup` used by the command.'''
+
+    __slots__ = ('name', 'function', 'signature', 'help', 'description',
+                 'params', 'stdin_from', 'options')
+
+    def __init__(self, name, function, signature, help=None, description=None,
+                 params=(), stdin_from=None, options=()):
+        self.name = name
+        self.function = function
+        self.signature = signature
+        self.help = help
+        self.description = description
+        self.params = tuple(params)
+        self.stdin_from = stdin_from
+        self.options = tuple(options)
+
+    def __repr__(self):
+        return 'CommandSpec({0!r}, {1!r})'.format(self.name, self.function)
+
+    def populate(self, parser, options=()):
+        '''Add the arguments of the command to *parser*, followed by the
+        options of its groups and of the *options* groups. The options with
+        the name of a parameter of the function are left out.'''
+        for param in self.params:
+            param.add_to(parser)
+        names = set(self.signature.parameters)
+        groups = []
+        for group in self.options + tuple(options):
+            if group not in groups:
+                groups.append(group)
+                group.add_to(parser, names)
+
+    def bind(self, arg_map):
+        '''Return the list of the positional arguments of the function, taken
+        from the parsed arguments. The ones which are bound are removed from
+        *arg_map*. The values of a non-variadic parameter read from stdin are
+        passed as a generator, without being read first.
+
+        :param arg_map: The parsed arguments, by destination.'''
+        real_args = []
+        for name, arg in self.signature.parameters.items():
+            if arg.kind is arg.VAR_POSITIONAL:
+                values = arg_map.get(name)
+                if values == [STDIN_MARKER] or \
+                        (not values and name == self.stdin_from):
+                    values = _read_stdin()
+                if values:
+                    real_args.extend(values)
+                    arg_map.pop(name)
+            else:
+                value = arg_map.pop(name)
+                if name == self.stdin_from and \
+                        (not value or value == [STDIN_MARKER]):
+                    value = _read_stdin()
+                real_args.append(value)
+        return real_args
+
+
+def _read_stdin():
+    return iter_delimited(getattr(sys.stdin, 'buffer', sys.stdin))
@@ -0,0 +1,269 @@
+'''Extraction of the commands defined in Python source files, without
+importing them.
+
+The modules are parsed with :py:mod:`ast` and the functions decorated with
+``@command`` (``@program.command``, ``@program.sub.command``, ...) are
+collected along with the ``@arg`` decorators applied before it and the
+subprograms created with ``add_subprog``. Signatures, defaults, annotations
+and docstrings are then fed to the same pipeline used when registering a
+function, so that the arguments are identical, as long as the defaults and
+the arguments of the decorators are literals or names of builtin types.
+Other expressions cannot be evaluated without importing the module and are
+kept as :class:`Unevaluated` values.
+
+This is useful to build help, completion scripts or manifests for large
+programs, whose modules would pull in heavy dependencies when imported::
+
+    from mando.static import scan_files
+
+    for cmd in scan_files(paths):
+        cmd_help, cmd_desc, params = cmd.analyze()'''
+
+import ast
+import builtins
+import collections
+import concurrent.futures
+import inspect
+import typing
+
+from mando.core import analyze_signature, make_params
+from mando.utils import analyze_doc
+
+
+class Unevaluated:
+    '''An expression which cannot be evaluated statically, such as a call or
+    a name defined in the module. It is represented by its source.'''
+
+    __slots__ = ('source',)
+
+    def __init__(self, source):
+        self.source = source
+
+    def __repr__(self):
+        return self.source
+
+    def __eq__(self, other):
+        return (isinstance(other, Unevaluated) and
+                other.source == self.source)
+
+    def __hash__(self):
+        return hash(self.source)
+
+    def __reduce__(self):
+        return Unevaluated, (self.source,)
+
+
+_StaticCommand = collections.namedtuple(
+    '_StaticCommand',
+    'name function doc doctype signature overrides path parser_kwargs '
+    'filename lineno')
+
+
+class StaticCommand(_StaticCommand):
+    '''A command found in a source file.
+
+    :param name: The name of the command.
+    :param function: The name of the decorated function.
+    :param doc: The docstring, prepared as when registering the function.
+    :param doctype: The docstring style given to ``@command``.
+    :param signature: The :py:class:`inspect.Signature` of the function.
+    :param overrides: The ``(args, kwargs)`` given to ``@arg``, by parameter
+        name.
+    :param path: The names of the subprograms the command belongs to.
+    :param parser_kwargs: The other keyword arguments given to ``@command``.
+    :param filename: The path of the source file.
+    :param lineno: The line of the function definition.'''
+
+    __slots__ = ()
+
+    def analyze(self):
+        '''Return a tuple ``(help, desc, params)``, where ``params`` are the
+        :class:`mando.spec.ParamSpec` of the parameters, as in the spec of
+        the command once registered.'''
+        cmd_help, cmd_desc, doc_params = analyze_doc(self.doc, self.doctype)
+        params = make_params(self.signature, analyze_signature(
+            self.signature, doc_params, self.overrides))[0]
+        return cmd_help or None, cmd_desc or None, params
+
+
+def scan_source(source, filename='<unknown>'):
+    '''Return the list of the :class:`StaticCommand` defined in *source*.
+
+    :param source: The source of a Python module.
+    :param filename: The name of the file, used in error messages.'''
+    return _Scanner(filename).scan(ast.parse(source, filename))
+
+
+def scan_file(path):
+    '''Return the list of the :class:`StaticCommand` defined in the Python
+    file at *path*.'''
+    with open(path, 'rb') as fobj:
+        return scan_source(fobj.read(), path)
+
+
+def scan_files(paths, workers=None):
+    '''Return the list of the :class:`StaticCommand` defined in all the given
+    files, in order. The files are parsed in parallel by a pool of *workers*
+    processes (by default one per CPU), unless *workers* is ``1``.'''
+    paths = list(paths)
+    if workers == 1 or len(paths) < 2:
+        results = map(scan_file, paths)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(scan_file, paths, chunksize=8))
+    return [cmd for commands in results for cmd in commands]
+
+
+class _Scanner:
+
+    def __init__(self, filename):
+        self.filename = filename
+        # subprograms, by the source of the expressions referring to them
+        self.paths = {}
+
+    def scan(self, tree):
+        commands = []
+        for node in _walk(tree):
+            if isinstance(node, ast.Assign):
+                self._visit_assign(node)
+            elif isinstance(node, ast.Call):
+                self._subprog_path(node)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                cmd = self._visit_function(node)
+                if cmd is not None:
+                    commands.append(cmd)
+        return commands
+
+    def _visit_assign(self, node):
+        path = self._subprog_path(node.value)
+        if path is not None:
+            for target in node.targets:
+                self.paths[ast.unparse(target)] = path
+
+    def _subprog_path(self, node):
+        '''Register the subprogram created by an ``add_subprog`` call and
+        return its path.'''
+        if not (isinstance(node, ast.Call) and
+                _method_name(node.func) == 'add_subprog' and node.args and
+                isinstance(node.args[0], ast.Constant)):
+            return None
+        parent = ast.unparse(node.func.value)
+        path = self.paths.get(parent, ()) + (node.args[0].value,)
+        self.paths['{0}.{1}'.format(parent, node.args[0].value)] = path
+        return path
+
+    def _visit_function(self, node):
+        for index, decorator in enumerate(node.decorator_list):
+            target = getattr(decorator, 'func', decorator)
+            if _method_name(target) == 'command':
+                break
+        else:
+            return None
+        overrides = {}
+        # the decorators below @command are applied before it
+        for below in reversed(node.decorator_list[index + 1:]):
+            if (isinstance(below, ast.Call) and
+                    _method_name(below.func) == 'arg' and below.args):
+                args = [_evaluate(arg) for arg in below.args]
+                overrides[args[0]] = (tuple(args[1:]), dict(
+                    (kw.arg, _evaluate(kw.value)) for kw in below.keywords))
+        name, doctype, parser_kwargs = node.name, 'rest', {}
+        if isinstance(decorator, ast.Call):
+            args = [_evaluate(arg) for arg in decorator.args]
+            kwargs = dict((kw.arg, _evaluate(kw.value))
+                          for kw in decorator.keywords)
+            name = kwargs.pop('name', None) or (args[:1] or [name])[0]
+            doctype = kwargs.pop('doctype', None) or (args[1:2] or
+                                                      [doctype])[0]
+            parser_kwargs = kwargs
+        receiver = target.value if isinstance(target, ast.Attribute) else None
+        path = self.paths.get(ast.unparse(receiver), ()) if receiver else ()
+        doc = (ast.get_docstring(node) or '').strip() + '\n'
+        return StaticCommand(name, node.name, doc, doctype,
+                             _signature(node.args), overrides, path,
+                             parser_kwargs, self.filename, node.lineno)
+
+
+def _walk(node):
+    '''Yield the nodes of the tree in source order, without descending into
+    the bodies of functions.'''
+    for child in ast.iter_child_nodes(node):
+        yield child
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef,
+                                  ast.Lambda)):
+            for grandchild in _walk(child):
+                yield grandchild
+
+
+def _method_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _evaluate(node):
+    '''Evaluate a literal or the name of a builtin type, or return an
+    :class:`Unevaluated` value.'''
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        pass
+    if isinstance(node, ast.Name):
+        value = getattr(builtins, node.id, None)
+        if isinstance(value, type):
+            return value
+    return Unevaluated(ast.unparse(node))
+
+
+# Annotations made only of these nodes, without calls, are evaluated with the
+# builtins and the names defined by the typing module
+_ANNOTATION_NODES = (ast.Name, ast.Attribute, ast.Subscript, ast.Tuple,
+                     ast.List, ast.Constant, ast.BinOp, ast.BitOr, ast.Load)
+_ANNOTATION_NAMES = dict((name, getattr(typing, name))
+                         for name in typing.__all__)
+_ANNOTATION_NAMES['typing'] = typing
+
+
+def _annotation(node):
+    if node is None:
+        return inspect.Parameter.empty
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if all(isinstance(child, _ANNOTATION_NODES) for child in ast.walk(node)):
+        code = compile(ast.Expression(node), '<annotation>', 'eval')
+        try:
+            return eval(code, {'__builtins__': builtins}, _ANNOTATION_NAMES)
+        except Exception:
+            pass
+    # other annotations are evaluated only when converting values, like the
+    # ones of modules using "from __future__ import annotations"
+    return ast.unparse(node)
+
+
+def _signature(args):
+    '''Build the :py:class:`inspect.Signature` of a function definition.'''
+    Parameter = inspect.Parameter
+    params = []
+    positional = args.posonlyargs + args.args
+    defaults = [Parameter.empty] * (len(positional) - len(args.defaults))
+    defaults.extend(_evaluate(node) for node in args.defaults)
+    for arg, default in zip(positional, defaults):
+        kind = (Parameter.POSITIONAL_ONLY if arg in args.posonlyargs else
+                Parameter.POSITIONAL_OR_KEYWORD)
+        params.append(Parameter(arg.arg, kind, default=default,
+                                annotation=_annotation(arg.annotation)))
+    if args.vararg:
+        params.append(Parameter(args.vararg.arg, Parameter.VAR_POSITIONAL,
+                                annotation=_annotation(
+                                    args.vararg.annotation)))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        default = Parameter.empty if default is None else _evaluate(default)
+        params.append(Parameter(arg.arg, Parameter.KEYWORD_ONLY,
+                                default=default,
+                                annotation=_annotation(arg.annotation)))
+    if args.kwarg:
+        params.append(Parameter(args.kwarg.arg, Parameter.VAR_KEYWORD,
+                                annotation=_annotation(args.kwarg.annotation)))
+    return inspect.Signature(params)
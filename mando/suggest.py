@@ -0,0 +1,166 @@
+'''Resolution of abbreviated commands and suggestions for mistyped ones.
+
+Names are indexed by their trigrams, so that only the names sharing at least
+one trigram with the mistyped word are compared with it, instead of all the
+commands of the program. Aliases and prefixes of names are resolved with a
+:class:`PrefixTrie`, in time proportional to their length.'''
+
+import collections
+
+# The number of names sharing the most trigrams with a word which are compared
+# with it
+CANDIDATES = 50
+
+
+def trigrams(word):
+    '''Return the set of the trigrams of *word*, padded so that short words
+    have some.'''
+    padded = '  {0} '.format(word.lower())
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def distance(first, second, limit):
+    '''Return the Damerau-Levenshtein distance between *first* and *second*,
+    or ``limit + 1`` as soon as it is known to exceed *limit*.'''
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        before, previous = previous, current
+        current = [i] + [0] * len(second)
+        for j, other in enumerate(second, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char != other))
+            if (before is not None and j > 1 and char == second[j - 2] and
+                    first[i - 2] == other):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+class TrigramIndex:
+    '''An index of names by trigram, which can be extended at any time.
+
+    :param names: The initial names.'''
+
+    def __init__(self, names=()):
+        self._postings = collections.defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        '''Add *name* to the index.'''
+        for trigram in trigrams(name):
+            self._postings[trigram].add(name)
+
+    def suggest(self, word, limit=3):
+        '''Return up to *limit* names close to *word*, the closest first. A
+        name is close if a third of its characters at most, and at least one,
+        must be changed to obtain *word*. Only the :data:`CANDIDATES` names
+        sharing the most trigrams with *word* are considered.'''
+        shared = collections.Counter()
+        for trigram in trigrams(word):
+            shared.update(self._postings.get(trigram, ()))
+        found = []
+        for name, count in shared.most_common(CANDIDATES):
+            max_distance = max(1, len(name) // 3)
+            dist = distance(word.lower(), name.lower(), max_distance)
+            if dist <= max_distance:
+                found.append((dist, -count, name))
+        return [name for _, _, name in sorted(found)[:limit]]
+
+
+def did_you_mean(names):
+    '''Format the suggestions returned by :meth:`TrigramIndex.suggest`.'''
+    if not names:
+        return ''
+    return ' (did you mean {0}?)'.format(' or '.join(map(repr, names)))
+
+
+class AmbiguousPrefix(ValueError):
+    '''Raised when a prefix matches several names.
+
+    :param prefix: The prefix.
+    :param candidates: The sorted list of the names it matches.'''
+
+    def __init__(self, prefix, candidates):
+        super(AmbiguousPrefix, self).__init__(prefix, candidates)
+        self.prefix = prefix
+        self.candidates = candidates
+
+
+# The value of _Node.unique when several names start with the prefix
+_AMBIGUOUS = object()
+
+
+class _Node:
+
+    __slots__ = ('children', 'exact', 'unique')
+
+    def __init__(self):
+        self.children = {}
+        # the name ending here and the only one starting with the prefix
+        self.exact = self.unique = None
+
+
+class PrefixTrie:
+    '''Names and their aliases, which can be looked up from any prefix
+    shared with no other name.'''
+
+    __slots__ = ('_root',)
+
+    def __init__(self):
+        self._root = _Node()
+
+    def add(self, name, target=None):
+        '''Add *name*, standing for *target*, by default itself. Raise
+        :py:exc:`ValueError` if it is already present.'''
+        target = name if target is None else target
+        path = [self._root]
+        for char in name:
+            path.append(path[-1].children.setdefault(char, _Node()))
+        if path[-1].exact is not None:
+            raise ValueError('{0!r} is already present'.format(name))
+        path[-1].exact = target
+        for node in path:
+            if node.unique is None:
+                node.unique = target
+            elif node.unique != target:
+                node.unique = _AMBIGUOUS
+
+    def get(self, name):
+        '''Return the target of *name*, or ``None`` if it is missing.'''
+        node = self._find(name)
+        return node.exact if node is not None else None
+
+    def resolve(self, prefix):
+        '''Return the target of *prefix*, if it is a name, or else of the
+        names starting with it, if they all stand for the same target. Return
+        ``None`` if no name starts with it and raise :class:`AmbiguousPrefix`
+        if the names starting with it stand for several targets.'''
+        node = self._find(prefix) if prefix else None
+        if node is None:
+            return None
+        if node.exact is not None:
+            return node.exact
+        if node.unique is _AMBIGUOUS:
+            raise AmbiguousPrefix(prefix, self._targets(node))
+        return node.unique
+
+    def _find(self, prefix):
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _targets(self, node):
+        targets, stack = set(), [node]
+        while stack:
+            node = stack.pop()
+            if node.exact is not None:
+                targets.add(node.exact)
+            stack.extend(node.children.values())
+        return sorted(targets)
@@ -0,0 +1,27 @@
+'''Commands whose annotations are strings.'''
+
+from __future__ import annotations
+
+import pathlib
+import typing
+from typing import List, Optional
+
+from mando import Program
+
+
+program = Program('future.py')
+
+
+@program.command
+def total(values: list[int], scale: Optional[float] = None):
+    return sum(values) * (scale or 1)
+
+
+@program.command
+def join(paths: typing.Sequence[pathlib.Path], suffix: str | None = None):
+    return [str(path) + (suffix or '') for path in paths]
+
+
+@program.command
+def tags(tag: List[str] = None, count: tuple[int, ...] = None):
+    return tag, count
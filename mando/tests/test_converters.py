@@ -0,0 +1,149 @@
+import argparse
+import enum
+import pathlib
+import typing
+import pytest
+from mando import Program
+from mando.converters import argparse_kwargs, converter_for, register, to_bool
+
+from .future_annotations import program as future_program
+
+
+program = Program('example.py', '1.0.10')
+
+
+class Color(enum.Enum):
+    red = 'r'
+    green = 'g'
+
+
+class Celsius(float):
+    pass
+
+
+@register(Celsius)
+def to_celsius(value):
+    return Celsius(value.rstrip('C'))
+
+
+@program.command
+def paint(color: Color, shade: typing.Optional[int] = None):
+    return color, shade
+
+
+@program.command
+def total(values: typing.List[int], scale: float = 1.0):
+    return sum(values) * scale
+
+
+@program.command
+def pick(mode: typing.Literal['fast', 'slow'] = 'fast', tags: list[str] = None):
+    return mode, tags
+
+
+@program.command
+def heat(temperature: Celsius, verbose: bool = False):
+    return temperature, verbose
+
+
+@program.command
+def where(path: 'pathlib.Path'):
+    return path
+
+
+PROGRAM_EXECUTE_CASES = [
+    ('paint red', (Color.red, None)),
+    ('paint g --shade 3', (Color.green, 3)),
+    ('total 1 2 3', 6),
+    ('total 1 2 --scale 0.5', 1.5),
+    ('total', 0),
+    ('pick', ('fast', None)),
+    ('pick --mode slow --tags a --tags b', ('slow', ['a', 'b'])),
+    ('heat 20C', (20.0, False)),
+    ('heat 20 --verbose', (20.0, True)),
+    ('where /tmp', pathlib.Path('/tmp')),
+]
+
+
+@pytest.mark.parametrize('args,result', PROGRAM_EXECUTE_CASES)
+def test_program_execute(args, result):
+    assert result == program.execute(args.split())
+
+
+@pytest.mark.parametrize('args', ['paint blue', 'pick --mode medium'])
+def test_program_invalid_choice(args):
+    with pytest.raises(SystemExit):
+        program.execute(args.split())
+
+
+ARGPARSE_KWARGS_CASES = [
+    (int, False, {'type': int}),
+    (typing.Optional[float], False, {'type': float}),
+    (typing.Union[None, str], False, {'type': str}),
+    (typing.Sequence[int], True, {'type': int, 'nargs': '*'}),
+    (tuple[int, ...], False, {'type': int, 'action': 'append'}),
+    (typing.List, True, {'type': str, 'nargs': '*'}),
+    (str, True, {'type': str}),
+]
+
+
+@pytest.mark.parametrize('annotation,positional,kwargs',
+                         ARGPARSE_KWARGS_CASES)
+def test_argparse_kwargs(annotation, positional, kwargs):
+    assert kwargs == argparse_kwargs(annotation, positional)
+
+
+STRING_ARGPARSE_KWARGS_CASES = [
+    ('int', False, 'int', {}),
+    ('Optional[float]', True, 'float', {}),
+    ('typing.Union[None, str]', False, 'str', {}),
+    ('pathlib.Path | None', False, 'pathlib.Path', {}),
+    ('list[int]', True, 'int', {'nargs': '*'}),
+    ('typing.Sequence[Optional[int]]', False, 'Optional[int]',
+     {'action': 'append'}),
+    ('tuple[int, ...]', False, 'int', {'action': 'append'}),
+    ('Optional[List]', True, 'str', {'nargs': '*'}),
+    ('typing.Literal["a", "b"]', False, 'typing.Literal["a", "b"]', {}),
+    ('not valid(', False, 'not valid(', {}),
+]
+
+
+@pytest.mark.parametrize('annotation,positional,item,kwargs',
+                         STRING_ARGPARSE_KWARGS_CASES)
+def test_argparse_kwargs_string(annotation, positional, item, kwargs):
+    result = argparse_kwargs(annotation, positional)
+    assert item == result.pop('type').annotation
+    assert kwargs == result
+
+
+FUTURE_EXECUTE_CASES = [
+    ('total 1 2', 3),
+    ('total 1 2 --scale 0.5', 1.5),
+    ('join a b --suffix .py', ['a.py', 'b.py']),
+    ('tags --tag x --tag y --count 1 --count 2', (['x', 'y'], [1, 2])),
+    ('tags', (None, None)),
+]
+
+
+@pytest.mark.parametrize('args,result', FUTURE_EXECUTE_CASES)
+def test_future_annotations(args, result):
+    assert result == future_program.execute(args.split())
+
+
+def test_converter_cache():
+    assert converter_for(Color) is converter_for(Color)
+    assert converter_for(bool) is to_bool
+    with pytest.raises(TypeError):
+        converter_for(42)
+
+
+@pytest.mark.parametrize('value,result', [
+    ('1', True), ('Yes', True), ('off', False), ('false', False),
+])
+def test_to_bool(value, result):
+    assert result is to_bool(value)
+
+
+def test_to_bool_invalid():
+    with pytest.raises(argparse.ArgumentTypeError):
+        to_bool('maybe')
@@ -1,6 +1,10 @@
+import argparse
+import io
 from contextlib import contextmanager
 import pytest
-from mando import Program
+from mando import Program, lazy
+
+from . import capture
 
 
 program = Program('example.py', '1.0.10')
@@ -142,6 +146,45 @@ def append(acc=[]):
     return acc
 
 
+root_calls = []
+
+
+def find_root():
+    root_calls.append(1)
+    return '/root'
+
+
+@program.command(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+def where(path=lazy(find_root)):
+    '''Print the root.
+
+    :param -p, --path: The root path.'''
+    return path
+
+
+@program.command
+@program.arg('jobs', type=int, default_factory=lambda: 4)
+def build(jobs=None):
+    return jobs
+
+
+@program.command
+def index(*paths):
+    return paths
+
+
+@program.command
+@program.arg('paths', stdin=True)
+def slurp(*paths):
+    return paths
+
+
+@program.command
+@program.arg('lines', stdin=True)
+def count(lines):
+    return lines
+
+
 GENERIC_COMMANDS_CASES = [
     ('goo 2', [['2', False, None]]),
     ('goo 2 --verbose', [['2', True, None]]),
@@ -253,3 +296,114 @@ def test_program_options(args, result):
     assert "example.py" == program.name
     assert result == program.execute(args)
 
+
+
+class FakeStdin(io.TextIOWrapper):
+    def __init__(self, data):
+        super(FakeStdin, self).__init__(io.BytesIO(data))
+
+
+PROGRAM_STDIN_CASES = [
+    ('index a b', b'', ('a', 'b')),
+    ('index -', b'x\0y z\0\0w', ('x', 'y z', 'w')),
+    ('index -', b'x\ny z\r\n\nw\n', ('x', 'y z', 'w')),
+    ('index', b'x\ny', ()),
+    ('slurp', b'x\ny', ('x', 'y')),
+    ('slurp a', b'x\ny', ('a',)),
+]
+
+
+@pytest.mark.parametrize('args,data,result', PROGRAM_STDIN_CASES)
+def test_program_stdin(monkeypatch, args, data, result):
+    monkeypatch.setattr('sys.stdin', FakeStdin(data))
+    assert result == program.execute(args.split())
+
+
+@pytest.mark.parametrize('args,result', [
+    ('count', ['x', 'y']),
+    ('count -', ['x', 'y']),
+    ('count a b', ['a', 'b']),
+])
+def test_program_stdin_lazy(monkeypatch, args, result):
+    stdin = FakeStdin(b'x\ny')
+    monkeypatch.setattr('sys.stdin', stdin)
+    lines = program.execute(args.split())
+    if args == 'count a b':
+        assert result == lines
+    else:
+        # stdin is only read when the values are consumed
+        assert 0 == stdin.buffer.tell()
+        assert result == list(lines)
+
+
+PROGRAM_LAZY_CASES = [
+    ('where', '/root', 1),
+    ('where -p /home', '/home', 0),
+    ('build', 4, 0),
+    ('build --jobs 2', 2, 0),
+]
+
+
+@pytest.mark.parametrize('args,result,calls', PROGRAM_LAZY_CASES)
+def test_program_lazy_defaults(args, result, calls):
+    del root_calls[:]
+    assert result == program.execute(args.split())
+    assert calls == len(root_calls)
+
+
+def test_lazy_default_help():
+    del root_calls[:]
+    with pytest.raises(SystemExit):
+        with capture.capture_sys_output() as (stdout, stderr):
+            program.execute(['where', '--help'])
+    assert '(default: <find_root>)' in stdout.getvalue()
+    assert not root_calls
+
+
+def test_lazy_default_variadic():
+    other = Program('other.py')
+    with pytest.raises(ValueError):
+        other.command(other.arg('paths', default_factory=list)(
+            lambda *paths: paths))
+    assert {} == other.commands
+
+
+def test_shared_docstring_analysis():
+    def make(default):
+        def scale(value, factor=default):
+            '''Scale a value.
+
+            :param -f, --factor <int>: The factor.'''
+            return value * factor
+        return scale
+
+    first, second = Program('first'), Program('second')
+    first.command(make(2))
+    second.command(make(3))
+    assert '22' == first.execute(['scale', '2'])
+    assert '222' == second.execute(['scale', '2'])
+    assert '2222' == second.execute(['scale', '2', '-f', '4'])
+
+
+def test_commands_with_same_function_name():
+    other = Program('other')
+    nested = other.add_subprog('nested')
+
+    @other.command
+    def run(a):
+        return 'top ' + a
+
+    @nested.command('run')
+    def run(a, b):
+        return 'nested {0} {1}'.format(a, b)
+
+    @other.command('alias')
+    def run(a, b, c):
+        return 'alias {0} {1} {2}'.format(a, b, c)
+
+    assert 'top x' == other.execute(['run', 'x'])
+    assert 'nested x y' == other.execute(['nested', 'run', 'x', 'y'])
+    assert 'alias x y z' == other.execute(['alias', 'x', 'y', 'z'])
+    assert ['run', 'alias'] == list(other.commands)
+    assert ['run'] == list(other.nested.commands)
+    assert ['a', 'b'] == list(other.nested.commands['run'].signature.parameters)
@@ -0,0 +1,222 @@
+import argparse
+import importlib.metadata
+import json
+import subprocess
+import sys
+
+import pytest
+from mando import Program
+from mando.discovery import (Plugin, environment_fingerprint, find_plugins,
+                             list_modules, package_directory, scan)
+
+from . import capture
+
+
+ENTRY_POINTS = '''[mando.commands]
+greet = mando_plugin_commands:greet
+
+[mando.subprograms]
+tools = mando_plugin_tools:setup
+'''
+
+COMMANDS = '''
+def greet(name, loud=False):
+    """Greet someone.
+
+    :param -l, --loud: Shout."""
+    text = 'hello ' + name
+    return text.upper() if loud else text
+'''
+
+TOOLS = '''
+def setup(prog):
+    @prog.command
+    def count(*items):
+        return len(items)
+'''
+
+PLUGINS = [
+    Plugin('mando.commands', 'greet', 'mando_plugin_commands:greet',
+           'mando-plugin'),
+    Plugin('mando.subprograms', 'tools', 'mando_plugin_tools:setup',
+           'mando-plugin'),
+]
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    dist_info = tmp_path / 'mando_plugin-1.0.dist-info'
+    dist_info.mkdir()
+    (dist_info / 'METADATA').write_text(
+        'Metadata-Version: 2.1\nName: mando-plugin\nVersion: 1.0\n')
+    (dist_info / 'entry_points.txt').write_text(ENTRY_POINTS)
+    (tmp_path / 'mando_plugin_commands.py').write_text(COMMANDS)
+    (tmp_path / 'mando_plugin_tools.py').write_text(TOOLS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for module in ('mando_plugin_commands', 'mando_plugin_tools'):
+        sys.modules.pop(module, None)
+
+
+def test_scan(site):
+    assert PLUGINS == scan(['mando.commands', 'mando.subprograms'])
+    assert [] == scan(['mando.nothing'])
+
+
+def test_plugin_load(site):
+    assert 'hello x' == PLUGINS[0].load()('x')
+
+
+DISCOVER_CASES = [
+    ('greet world', 'hello world'),
+    ('greet world --loud', 'HELLO WORLD'),
+    ('tools count a b c', 3),
+]
+
+
+@pytest.mark.parametrize('args,result', DISCOVER_CASES)
+def test_discover(site, args, result):
+    program = Program('plugins.py')
+    program.discover()
+    assert result == program.execute(args.split())
+
+
+def test_discover_lazy(site):
+    program = Program('plugins.py')
+    program.discover()
+    assert {} == program.commands
+    assert 'mando_plugin_commands' not in sys.modules
+    assert 'hello x' == program.execute(['greet', 'x'])
+    assert ['greet'] == list(program.commands)
+    assert 'mando_plugin_tools' not in sys.modules
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            program.execute(['tools', '--help'])
+    assert 'count' in stdout.getvalue()
+    assert ['tools'] == list(program.subprograms)
+
+
+@pytest.mark.parametrize('module,lazy', [
+    ('mando.discovery', 'importlib.metadata'),
+    ('mando', 'mando.discovery'),
+    ('mando', 'mando.search'),
+])
+def test_imported_lazily(module, lazy):
+    code = 'import sys, {0}; print({1!r} in sys.modules)'.format(module, lazy)
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     universal_newlines=True)
+    assert 'False' == output.strip()
+
+
+def test_find_plugins_cache(site, tmp_path, monkeypatch):
+    cache_file = str(tmp_path / 'cache' / 'plugins.json')
+    assert PLUGINS == find_plugins(cache_file=cache_file)
+    with open(cache_file) as fobj:
+        assert environment_fingerprint() == json.load(fobj)['fingerprint']
+
+    def fail():
+        raise AssertionError('entry points scanned')
+    monkeypatch.setattr(importlib.metadata, 'entry_points', fail)
+    assert PLUGINS == find_plugins(cache_file=cache_file)
+    # other groups are scanned
+    with pytest.raises(AssertionError):
+        find_plugins(['mando.commands'], cache_file)
+
+
+def test_find_plugins_cache_invalidated(site, tmp_path):
+    cache_file = str(tmp_path / 'plugins.json')
+    assert PLUGINS == find_plugins(cache_file=cache_file)
+    dist_info = site / 'other-2.0.dist-info'
+    dist_info.mkdir()
+    (dist_info / 'METADATA').write_text(
+        'Metadata-Version: 2.1\nName: other\nVersion: 2.0\n')
+    (dist_info / 'entry_points.txt').write_text(
+        '[mando.commands]\nother = other:main\n')
+    other = Plugin('mando.commands', 'other', 'other:main', 'other')
+    assert sorted(PLUGINS + [other]) == \
+        sorted(find_plugins(cache_file=cache_file))
+
+
+def test_environment_fingerprint(tmp_path):
+    empty = environment_fingerprint([str(tmp_path)])
+    assert empty == environment_fingerprint([str(tmp_path),
+                                             str(tmp_path / 'missing')])
+    (tmp_path / 'a-1.0.dist-info').mkdir()
+    assert empty != environment_fingerprint([str(tmp_path)])
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    root = tmp_path / 'mando_tree'
+    (root / 'db').mkdir(parents=True)
+    (root / '__init__.py').write_text('')
+    (root / 'build.py').write_text(
+        'def setup(prog):\n'
+        '    @prog.command\n'
+        '    def run(target):\n'
+        '        return "build " + target\n')
+    (root / 'parser.py').write_text(
+        'def setup(prog):\n'
+        '    prog.command("walk")(lambda: prog.parser.prog)\n')
+    (root / '_private.py').write_text('raise ImportError\n')
+    (root / 'notes.txt').write_text('')
+    (root / 'db' / '__init__.py').write_text('')
+    (root / 'db' / 'migrate.py').write_text(
+        'def setup(prog):\n'
+        '    prog.command("up")(lambda: "migrated")\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield root
+    for module in list(sys.modules):
+        if module.startswith('mando_tree'):
+            del sys.modules[module]
+
+
+def test_list_modules(tree):
+    assert [('build', False), ('db', True), ('parser', False)] == \
+        list_modules(str(tree))
+    assert [('migrate', False)] == list_modules(str(tree / 'db'))
+
+
+MOUNT_CASES = [
+    ('tools build run x', 'build x'),
+    ('tools db migrate up', 'migrated'),
+    # the names of the modules do not clash with the attributes
+    ('tools parser walk', 'tree.py tools parser'),
+]
+
+
+@pytest.mark.parametrize('args,result', MOUNT_CASES)
+def test_mount_package(tree, args, result):
+    program = Program('tree.py')
+    program.add_subprog('tools', package='mando_tree')
+    assert 'mando_tree' not in sys.modules
+    assert result == program.execute(args.split())
+    assert isinstance(program.tools.parser, argparse.ArgumentParser)
+
+
+def test_mount_package_lazy(tree):
+    program = Program('tree.py')
+    tools = program.add_subprog('tools', package='mando_tree')
+    assert {} == tools.subprograms
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            program.execute(['tools', 'db', '--help'])
+    assert ['db'] == list(tools.subprograms)
+    assert 'mando_tree.db' in sys.modules
+    assert 'mando_tree.build' not in sys.modules
+    assert 'mando_tree.db.migrate' not in sys.modules
+
+
+def test_package_directory(tree):
+    assert str(tree) == package_directory('mando_tree')
+    with pytest.raises(ImportError):
+        package_directory('mando_tree.build')
+
+
+def test_search_does_not_import(tree):
+    program = Program('tree.py', help_command=True)
+    program.add_subprog('tools', package='mando_tree')
+    with capture.capture_sys_output() as (stdout, stderr):
+        program.execute(['help', '--search', 'db'])
+    assert 'tools db' in stdout.getvalue()
+    assert 'mando_tree.db' not in sys.modules
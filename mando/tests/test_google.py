@@ -1,6 +1,10 @@
+import inspect
 import sys
 import pytest
 from mando import Program
+from mando.napoleon import (CONFIGS, Config, GoogleDocstring, Parameter,
+                            parse_docstring)
+from mando.napoleon.iterators import line_cursor
 
 from . import capture
 
@@ -58,3 +62,61 @@ def test_google_docstring_help(args, result):
         with capture.capture_sys_output() as (stdout, stderr):
             program.execute(args)
     assert result == stdout.getvalue()
+
+
+def test_parse_docstring():
+    parsed = parse_docstring(inspect.cleandoc('''Summary only.
+
+    Args:
+      *names (str): The names,
+        one per argument.
+    Keyword Args:
+      sep: The separator.
+    Returns:
+      str: Description of return value.
+    '''), 'google')
+    assert 'Summary only.' == parsed.summary
+    assert '' == parsed.description
+    assert [
+        Parameter('names', 'str', ['The names,', 'one per argument.']),
+        Parameter('sep', '', ['The separator.']),
+    ] == parsed.parameters
+
+
+@pytest.mark.parametrize('doc,description', [
+    ('Summary.\n\nIntro.\nArgs:\n    a: The a.\nMore.', 'Intro.\n\nMore.'),
+    ('Summary.\n\nIntro.\n\nArgs:\n    a: The a.\nMore.',
+     'Intro.\n\nMore.'),
+    ('Summary.\n\nExample:\n    prog a\nArgs:\n    a: The a.\nMore.',
+     'Example:\n    prog a\n\nMore.'),
+    ('Summary.\n\nIntro.\nReturns:\n    int: The b.\nMore.',
+     'Intro.\n\nMore.'),
+])
+def test_parse_docstring_paragraphs(doc, description):
+    assert description == parse_docstring(doc, 'google').description
+
+
+def test_line_cursor():
+    cursor = line_cursor(['a  ', '', '  b', '    c', ''])
+    assert ['a', '', '  b', '    c', ''] == cursor.lines
+    assert bytearray([0, 1, 0, 0, 1]) == cursor.blank
+    assert [0, 0, 2, 4, 0] == list(cursor.indents)
+    assert [0, 2, 2, 4, 0, 0] == list(cursor.next_indents)
+    assert 'a' == next(cursor)
+    assert ['', '  b'] == cursor.peek(2)
+    assert [next(cursor) for _ in range(4)] == cursor.lines[1:]
+    assert not cursor.has_next()
+    assert cursor.sentinel is cursor.peek()
+    assert [cursor.sentinel] * 2 == cursor.peek(2)
+
+
+def test_shared_config():
+    config = Config(napoleon_use_param=False)
+    assert not config.napoleon_use_param
+    with pytest.raises(AttributeError):
+        config.napoleon_use_param = True
+    with pytest.raises(AttributeError):
+        del CONFIGS['google'].napoleon_use_rtype
+    parsed = GoogleDocstring('Summary.', CONFIGS['google'])
+    assert parsed._config is CONFIGS['google']
+    assert not hasattr(parsed, '__dict__')
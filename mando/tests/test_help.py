@@ -0,0 +1,186 @@
+import argparse
+import contextlib
+import pytest
+from mando import Program
+import functools
+from mando.help import HelpCache, fingerprint, _describe
+
+from . import capture
+
+
+renders = []
+
+
+class CountingFormatter(argparse.HelpFormatter):
+
+    def format_help(self):
+        renders.append(1)
+        return super(CountingFormatter, self).format_help()
+
+
+def make_program(**kwargs):
+    program = Program('help.py', **kwargs)
+
+    @program.command(formatter_class=CountingFormatter)
+    def cmd(path, jobs=1):
+        '''Do something.
+
+        :param path: The path.
+        :param -j, --jobs <int>: The jobs.'''
+    return program, program._subparsers.choices['cmd']
+
+
+def test_cached_help(monkeypatch):
+    monkeypatch.setenv('COLUMNS', '80')
+    program, parser = make_program()
+    del renders[:]
+    text = parser.format_help()
+    assert text == parser.format_help()
+    assert 1 == len(renders)
+    monkeypatch.setenv('COLUMNS', '40')
+    assert text != parser.format_help()
+    assert 2 == len(renders)
+    parser.add_argument('--new', help='New option.')
+    assert '--new' in parser.format_help()
+    assert 3 == len(renders)
+
+
+def test_disk_cache(tmpdir, monkeypatch):
+    monkeypatch.setenv('COLUMNS', '80')
+    directory = str(tmpdir.join('cache'))
+    del renders[:]
+    texts = [make_program(help_cache_dir=directory)[1].format_help()
+             for _ in range(2)]
+    assert texts[0] == texts[1]
+    assert 1 == len(renders)
+    assert 1 == len(tmpdir.join('cache').listdir())
+
+
+@pytest.mark.parametrize('attr', ['mando.__version__', 'sys.version'])
+def test_disk_cache_versions(attr, tmpdir, monkeypatch):
+    monkeypatch.setenv('COLUMNS', '80')
+    directory = str(tmpdir.join('cache'))
+    make_program(help_cache_dir=directory)[1].format_help()
+    monkeypatch.setattr(attr, 'other')
+    del renders[:]
+    make_program(help_cache_dir=directory)[1].format_help()
+    assert 1 == len(renders)
+    assert 2 == len(tmpdir.join('cache').listdir())
+
+
+FINGERPRINT_CASES = [
+    (lambda p: None, True),
+    (lambda p: p.add_argument('--x'), False),
+    (lambda p: setattr(p, 'description', 'Other.'), False),
+    (lambda p: p.add_subparsers().add_parser('sub', help='A sub.'), False),
+]
+
+
+@pytest.mark.parametrize('change,same', FINGERPRINT_CASES)
+def test_fingerprint(change, same):
+    parser = make_program()[1]
+    before = fingerprint(parser)
+    change(parser)
+    assert same == (before == fingerprint(parser))
+    assert fingerprint(parser) == fingerprint(parser)
+
+
+def test_help_cache():
+    cache = HelpCache()
+    assert 'a' == cache.get('key', lambda: 'a')
+    assert 'a' == cache.get('key', lambda: 'b')
+    cache.clear()
+    assert 'b' == cache.get('key', lambda: 'b')
+
+
+def make_annotated_program():
+    program = Program('help.py')
+
+    @program.command
+    def cmd(count: 'int', items: 'list[int]' = ()):
+        pass
+    return program._subparsers.choices['cmd']
+
+
+def test_fingerprint_stable():
+    # the converters of string annotations are new objects in each program
+    assert fingerprint(make_annotated_program()) == \
+        fingerprint(make_annotated_program())
+
+
+DESCRIBE_CASES = [
+    (None, None),
+    ([1, 'a'], [1, 'a']),
+    ({'b': 1, 'a': 2}, ['a', 'b']),
+    (int, 'builtins.int'),
+    (object(), '<object object>'),
+    (functools.partial(make_program), 'functools.partial(<function '
+     'make_program>)'),
+]
+
+
+@pytest.mark.parametrize('value,expected', DESCRIBE_CASES)
+def test_describe(value, expected):
+    assert expected == _describe(value)
+
+
+def test_help_cache_pruned(tmpdir):
+    cache = HelpCache(str(tmpdir), max_files=2)
+    for key in 'abc':
+        cache.get(key, lambda: key)
+    assert 2 == len(tmpdir.listdir())
+    assert 'a' == cache.get('a', lambda: 'new')
+    assert 'new' == HelpCache(str(tmpdir)).get('a', lambda: 'new')
+
+
+def make_large_program():
+    program = Program('large', max_listed=4)
+
+    def make(name, group=None):
+        def cmd():
+            pass
+        cmd.__name__ = name
+        cmd.__doc__ = 'Run {0}.'.format(name)
+        program.command(group=group)(cmd)
+
+    for name in ('one', 'two'):
+        make(name)
+    for group in ('db', 'net'):
+        for index in range(3):
+            make('{0}{1}'.format(group, index), group)
+    sub = program.add_subprog('sub', help='Subprogram.')
+    sub.command(group='inner')(lambda: None)
+    return program
+
+
+LARGE_HELP_CASES = [
+    (['-h'], ['COMMAND', 'help ', 'one ', 'two ',
+              "...       3 more, see 'large help'"], ['db0', 'net']),
+    (['help'], ["db    3 commands, see 'large help db'", 'sub   Subprogram.'],
+     ['db0']),
+    (['help', 'net'], ['commands in net:', 'net2  Run net2.'], ['db']),
+    (['help', 'db1'], ['usage: large db1 [-h]', 'Run db1.'], []),
+    (['help', 'sub'], ["inner     1 command, see 'large help sub inner'"],
+     []),
+]
+
+
+@pytest.mark.parametrize('args,present,absent', LARGE_HELP_CASES)
+def test_large_help(args, present, absent, monkeypatch):
+    monkeypatch.setenv('COLUMNS', '80')
+    program = make_large_program()
+    with pytest.raises(SystemExit) if args == ['-h'] else \
+            contextlib.nullcontext():
+        with capture.capture_sys_output() as (stdout, stderr):
+            program.execute(args)
+    for text in present:
+        assert text in stdout.getvalue()
+    for text in absent:
+        assert text not in stdout.getvalue()
+
+
+def test_large_help_unknown():
+    with pytest.raises(SystemExit):
+        with capture.capture_sys_output() as (stdout, stderr):
+            make_large_program().execute(['help', 'nope'])
+    assert "unknown command or group: 'nope'" in stderr.getvalue()
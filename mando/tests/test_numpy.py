@@ -1,6 +1,8 @@
+import inspect
 import sys
 import pytest
 from mando import Program
+from mando.napoleon import Parameter, parse_docstring
 
 from . import capture
 
@@ -63,3 +65,36 @@ def test_numpy_docstring_help(args, result):
         with capture.capture_sys_output() as (stdout, stderr):
             program.execute(args)
     assert result == stdout.getvalue()
+
+
+def test_parse_docstring():
+    parsed = parse_docstring(inspect.getdoc(simple_numpy_docstring),
+                             'numpy')
+    assert 'One line summary.' == parsed.summary
+    assert 'Extended description.' == parsed.description
+    assert [
+        Parameter('arg1', 'int', ['Description of `arg1`']),
+        Parameter('arg2', 'str', ['Description of `arg2`']),
+    ] == parsed.parameters
+
+
+def test_parse_docstring_verbatim_sections():
+    parsed = parse_docstring(inspect.cleandoc('''Summary.
+
+    Parameters
+    ----------
+    x : int
+        The *x*.
+
+    Notes
+    -----
+    Some `notes`.
+
+    Examples
+    --------
+    >>> f(1)
+    '''), 'numpy')
+    assert 'Summary.' == parsed.summary
+    assert ('Notes\n-----\nSome `notes`.\n\n'
+            'Examples\n--------\n>>> f(1)') == parsed.description
+    assert [Parameter('x', 'int', ['The *x*.'])] == parsed.parameters
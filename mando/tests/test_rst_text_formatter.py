@@ -0,0 +1,41 @@
+import argparse
+import pytest
+from mando.rst_text_formatter import RSTHelpFormatter, render
+
+
+B, b = '\x1b[1m', '\x1b[22m'
+I, i = '\x1b[3m', '\x1b[23m'
+U, u = '\x1b[4m', '\x1b[24m'
+
+
+RENDER_CASES = [
+    ('plain [-h] {a,b} text', 'plain [-h] {a,b} text'),
+    ('*em* and **strong**', I + 'em' + i + ' and ' + B + 'strong' + b),
+    ('``literal`` and :obj:`role`', U + 'literal' + u + ' and ' + U + 'role' +
+     u),
+    ('`interpreted`', I + 'interpreted' + i),
+    ('*args, **kwargs, a*b, 2 * 3 * 4', '*args, **kwargs, a*b, 2 * 3 * 4'),
+    ('* one\n- two\n  + nested', '• one\n• two\n  • nested'),
+    ('#. one\n#. two\n\n#. again', '1. one\n2. two\n\n1. again'),
+    ('3) three', '3) three'),
+    (':param a: The a.', B + 'param a:' + b + ' The a.'),
+    ('Example::\n\n    *raw* ``text``\n\nAfter *em*.',
+     'Example:\n\n    *raw* ``text``\n\nAfter ' + I + 'em' + i + '.'),
+    ('Text.\n\n::\n\n    raw\nend', 'Text.\n\n    raw\nend'),
+]
+
+
+@pytest.mark.parametrize('text,result', RENDER_CASES)
+def test_render(text, result):
+    assert result == render(text, 'utf-8')
+
+
+def test_render_ascii_bullets():
+    assert '* one' == render('- one', 'ascii')
+
+
+def test_formatter():
+    parser = argparse.ArgumentParser('prog', description='A *nice* one.',
+                                     formatter_class=RSTHelpFormatter)
+    assert 'A ' + I + 'nice' + i + ' one.' in parser.format_help()
+    assert parser.format_usage().startswith('usage: prog [-h]')
@@ -0,0 +1,131 @@
+import pytest
+from mando import Program
+from mando.search import SearchIndex, search, tokenize
+
+from . import capture
+
+
+program = Program('search.py', help_command=True)
+db = program.add_subprog('db', help='Database commands.')
+
+
+@program.command(group='files')
+def upload(path, force=False):
+    '''Upload a file.
+
+    :param path: The file to send to the server.
+    :param -f, --force: Overwrite the remote copy.'''
+
+
+@program.command(group='files')
+def download(url):
+    '''Download a file.
+
+    The file is saved in the current directory.'''
+
+
+@db.command
+def migrate(revision='head'):
+    '''Migrate the database.
+
+    :param -r, --revision <str>: The target revision, e.g. a server tag.'''
+
+
+SEARCH_CASES = [
+    ('upload', [('upload',)]),
+    ('file', [('upload',), ('download',)]),
+    ('FILE up', [('upload',)]),
+    ('files', [('upload',), ('download',)]),
+    ('server', [('db', 'migrate'), ('upload',)]),
+    ('database', [('db', 'migrate'), ('db',)]),
+    ('overwrite', [('upload',)]),
+    ('revision', [('db', 'migrate')]),
+    ('nothing', []),
+    ('', []),
+]
+
+
+@pytest.mark.parametrize('query,paths', SEARCH_CASES)
+def test_search(query, paths):
+    index = SearchIndex(program)
+    assert paths == [path for path, _ in index.search(query)]
+
+
+def test_search_limit():
+    index = SearchIndex(program)
+    assert [(('upload',), 'Upload a file.')] == index.search('file', 1)
+
+
+def test_index_rebuilt():
+    other = Program('other.py')
+    other.command(lambda: None)
+    assert [] == search(other, 'report')
+
+    def report():
+        '''Print a report.'''
+    other.command(report)
+    assert [(('report',), 'Print a report.')] == \
+        search(other, 'report')
+
+
+def test_help_search():
+    with capture.capture_sys_output() as (stdout, stderr):
+        program.execute(['help', '--search', 'revision'])
+    assert stdout.getvalue() == '''commands matching 'revision':
+  db migrate  Migrate the database.
+'''
+
+
+def test_tokenize():
+    assert ['a', 'b', 'c', 'd2'] == tokenize('A b_c-D2')
+
+
+def test_search_does_not_build_parsers():
+    other = Program('other.py', help_command=True)
+
+    @other.command
+    def report(output='-'):
+        '''Print a report.
+
+        :param -o, --output: Where to write the report.'''
+    choices = other._subparsers.choices
+    with capture.capture_sys_output() as (stdout, stderr):
+        other.execute(['help', '--search', 'write'])
+    assert 'report  Print a report.' in stdout.getvalue()
+    assert not choices.is_built('report')
+
+
+def make_program(directory, summary):
+    other = Program('cached.py', help_cache_dir=directory)
+
+    def report():
+        pass
+    report.__doc__ = summary
+    other.command(report)
+    return other
+
+
+def test_index_persisted(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    first = make_program(directory, 'Print a report.')
+    assert [(('report',), 'Print a report.')] == search(first, 'print')
+    assert 1 == len(list(tmp_path.glob('search-*.bin')))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('index rebuilt')
+    monkeypatch.setattr(SearchIndex, '_add', fail)
+    # the same commands in another process
+    second = make_program(directory, 'Print a report.')
+    assert [(('report',), 'Print a report.')] == search(second, 'print')
+    # the commands changed
+    third = make_program(directory, 'Show a report.')
+    with pytest.raises(AssertionError):
+        search(third, 'show')
+
+
+def test_index_pruned(tmp_path):
+    directory = str(tmp_path)
+    search(make_program(directory, 'Print a report.'), 'print')
+    search(make_program(directory, 'Show a report.'), 'show')
+    search(Program('other.py', help_cache_dir=directory), 'show')
+    assert 2 == len(list(tmp_path.glob('search-*.bin')))
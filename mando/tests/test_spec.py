@@ -0,0 +1,168 @@
+import argparse
+
+import pytest
+from mando import OptionGroup, Program
+from mando.help import ParserMap
+from mando.spec import CommandSpec, ParamSpec
+
+from . import capture
+
+
+program = Program('spec.py')
+db = program.add_subprog('db')
+
+
+@program.command
+def copy(source, count=1, *paths):
+    '''Copy a file.
+
+    Copy it several times.
+
+    :param source: The file to copy.
+    :param -c, --count <int>: The number of copies.'''
+    return source, count, paths
+
+
+@db.command('drop-table')
+def drop(name, force=False):
+    '''Drop a table.
+
+    :param -f, --force: Do not ask.'''
+    return name, force
+
+
+def test_command_spec():
+    spec = program.commands['copy']
+    assert isinstance(spec, CommandSpec)
+    assert ('copy', copy) == (spec.name, spec.function)
+    assert ('Copy a file.', 'Copy it several times.') == (spec.help,
+                                                          spec.description)
+    assert ['source', 'count', 'paths'] == [p.name for p in spec.params]
+    assert [True, False, True] == [p.positional for p in spec.params]
+    assert ('-c', '--count') == spec.params[1].args
+    assert {'default': 1, 'dest': 'count', 'help': 'The number of copies.',
+            'metavar': '<int>', 'type': int} == spec.params[1].kwargs
+
+
+def test_walk():
+    assert [(('copy',), 'copy'), (('db', 'drop-table'), 'drop-table')] == \
+        [(path, spec.name) for path, spec in program.walk()]
+    assert [(('drop-table',), drop)] == \
+        [(path, spec.function) for path, spec in db.walk()]
+
+
+def test_parsers_built_when_needed():
+    other = Program('other.py')
+    other.command('first')(lambda: 1)
+    other.command('second')(lambda a: a)
+    choices = other._subparsers.choices
+    assert [False, False] == [choices.is_built(name) for name in choices]
+    assert 'x' == other.execute(['second', 'x'])
+    assert [False, True] == [choices.is_built(name) for name in choices]
+
+
+def test_parser_map():
+    built = []
+    parsers = ParserMap()
+    parsers.defer(('name', 'alias'), lambda: built.append(1) or object())
+    assert ['name', 'alias'] == list(parsers)
+    assert 'alias' in parsers and not parsers.is_built('alias')
+    assert parsers['alias'] is parsers.get('name')
+    assert [1] == built
+    assert parsers.is_built('name')
+    assert [('name', parsers['name']), ('alias', parsers['name'])] == \
+        parsers.items()
+    assert parsers.get('other') is None
+
+
+def test_param_spec_add_to():
+    parser = Program('add.py').parser
+    completer = object()
+    action = ParamSpec('x', ['-x'], {'type': int},
+                       completer).add_to(parser)
+    assert (['-x'], int, completer) == (action.option_strings, action.type,
+                                        action.completer)
+
+
+def test_conflicting_commands():
+    other = Program('other.py')
+    other.command('name')(lambda: 1)
+    with pytest.raises(argparse.ArgumentError):
+        other.command('name')(lambda: 2)
+    assert 1 == other.commands['name'].function()
+
+
+common = OptionGroup('common options')
+common.option('-v', '--verbose', action='store_true', help='Talk more.')
+common.option('-j', '--jobs', type=int, default=1)
+output = OptionGroup()
+output.option('--format', default='text')
+
+shared = Program('shared.py')
+shared.share(common)
+nested = shared.add_subprog('nested')
+nested.share(output)
+
+
+@shared.command
+def build(target):
+    return target, shared.verbose, shared.jobs
+
+
+@shared.command(options=[output])
+def show(target, jobs=4):
+    return target, jobs, shared.format
+
+
+@nested.command
+def run():
+    return shared.verbose, shared.format
+
+
+@shared.command
+def trace(vv=0):
+    '''Trace.
+
+    :param -v, --vv <int>: The level.'''
+    return vv, shared.verbose
+
+
+SHARED_OPTIONS_CASES = [
+    ('build x', ('x', False, 1)),
+    ('build x -v --jobs 3', ('x', True, 3)),
+    ('show x', ('x', 4, 'text')),
+    ('show x --jobs 2 --format json', ('x', 2, 'json')),
+    ('nested run -v --format json', (True, 'json')),
+    # -v is the option of the command
+    ('trace -v 2', (2, False)),
+    ('trace -v 2 --verbose', (2, True)),
+]
+
+
+@pytest.mark.parametrize('args,result', SHARED_OPTIONS_CASES)
+def test_shared_options(args, result):
+    assert result == shared.execute(args.split())
+
+
+def test_shared_options_help():
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            shared.execute(['build', '--help'])
+    assert 'common options:\n  -v, --verbose' in stdout.getvalue()
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            shared.execute(['trace', '--help'])
+    assert 'common options:\n  --verbose' in stdout.getvalue()
+
+
+def test_shared_options_deferred():
+    assert [common] == shared._option_groups()
+    assert [common, output] == nested._option_groups()
+    assert (output,) == shared.commands['show'].options
+    other = Program('other.py')
+    other.share(common)
+    other.command('first')(lambda: other.jobs)
+    other.command('second')(lambda: other.jobs)
+    choices = other._subparsers.choices
+    assert 3 == other.execute(['first', '-j', '3'])
+    assert [True, False] == [choices.is_built(name) for name in choices]
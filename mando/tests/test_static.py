@@ -0,0 +1,106 @@
+import inspect
+import pickle
+import pytest
+from mando import Program
+from mando.static import Unevaluated, scan_files, scan_source
+
+
+SOURCE = '''
+import typing
+from mando import Program
+
+program = Program('static.py')
+tools = program.add_subprog('tools')
+program.add_subprog('misc')
+
+
+@program.command
+def add(a, b: int, *rest, verbose=False, mode: typing.Literal['x', 'y']='x'):
+    """Add numbers.
+
+    A longer description.
+
+    :param a <int>: The first number.
+    :param -v, --verbose: Be verbose.
+    """
+
+
+@program.command('run-it', doctype='google')
+@program.arg('jobs', '-j', type=int, metavar='N')
+@program.arg('path', stdin=True)
+def run(path, jobs=1, *, names: list[str] = None):
+    """Run something.
+
+    Args:
+        path (str): The path.
+        jobs: The number of jobs.
+    """
+
+
+@tools.command
+def clean(level: 'Level' = 'all', **options):
+    """Clean."""
+
+
+@program.misc.command
+def nothing(when=compute()):
+    pass
+
+
+def helper(x=1):
+    pass
+'''
+
+
+STATIC_CASES = [
+    ('add', 'add', (), 'rest'),
+    ('run-it', 'run', (), 'google'),
+    ('clean', 'clean', ('tools',), 'rest'),
+    ('nothing', 'nothing', ('misc',), 'rest'),
+]
+
+
+@pytest.mark.parametrize('index,case', list(enumerate(STATIC_CASES)))
+def test_scan_source(index, case):
+    commands = scan_source(SOURCE, 'static.py')
+    assert len(STATIC_CASES) == len(commands)
+    cmd = commands[index]
+    assert case == (cmd.name, cmd.function, cmd.path, cmd.doctype)
+    assert 'static.py' == cmd.filename
+
+
+@pytest.mark.parametrize('function', ['add', 'run'])
+def test_identical_specs(function):
+    namespace = {'compute': lambda: None}
+    exec(compile(SOURCE, 'static.py', 'exec'), namespace)
+    func = namespace[function]
+    cmd = [c for c in scan_source(SOURCE) if c.function == function][0]
+    doc = (inspect.getdoc(func) or '').strip() + '\n'
+    assert doc == cmd.doc
+    assert inspect.signature(func) == cmd.signature
+    assert getattr(func, '_argopts', {}) == cmd.overrides
+    spec = Program('static.py')._make_spec(func, cmd.name, cmd.doctype)
+    cmd_help, cmd_desc, params = cmd.analyze()
+    assert (spec.help, spec.description) == (cmd_help, cmd_desc)
+    assert [(p.name, p.args, p.kwargs) for p in spec.params] == \
+        [(p.name, p.args, p.kwargs) for p in params]
+
+
+def test_unevaluated():
+    clean, nothing = scan_source(SOURCE)[2:]
+    assert 'Level' == clean.signature.parameters['level'].annotation
+    default = nothing.signature.parameters['when'].default
+    assert Unevaluated('compute()') == default
+    assert 'compute()' == repr(default)
+    assert default == pickle.loads(pickle.dumps(default))
+
+
+def test_scan_files(tmpdir):
+    paths = []
+    for index in range(3):
+        path = tmpdir.join('cmd{0}.py'.format(index))
+        path.write('@command\ndef cmd{0}():\n    pass\n'.format(index))
+        paths.append(str(path))
+    expected = ['cmd0', 'cmd1', 'cmd2']
+    assert expected == [c.name for c in scan_files(paths, workers=1)]
+    assert expected == [c.name for c in scan_files(paths, workers=2)]
@@ -0,0 +1,245 @@
+import pytest
+from mando import Program
+from mando.suggest import (AmbiguousPrefix, PrefixTrie, TrigramIndex,
+                           did_you_mean, distance)
+
+from . import capture
+
+
+program = Program('suggest.py')
+remote = program.add_subprog('remote')
+
+
+@program.command
+def install(name, upgrade=False):
+    '''Install a package.
+
+    :param -u, --upgrade: Upgrade the package.'''
+
+
+@program.command
+def uninstall(name):
+    pass
+
+
+@remote.command
+def add(url, fetch=False):
+    '''Add a remote.
+
+    :param -f, --fetch: Fetch the remote.'''
+
+
+@remote.command
+def remove(url):
+    pass
+
+
+DISTANCE_CASES = [
+    ('install', 'install', 0),
+    ('instal', 'install', 1),
+    ('insatll', 'install', 1),
+    ('uninstall', 'install', 2),
+    ('', 'abc', 3),
+    ('abcdef', 'a', 3),
+]
+
+
+@pytest.mark.parametrize('first,second,expected', DISTANCE_CASES)
+def test_distance(first, second, expected):
+    assert expected == distance(first, second, 2)
+
+
+SUGGEST_CASES = [
+    ('instal', ['install', 'uninstall']),
+    ('INSTALL', ['install', 'uninstall']),
+    ('remve', ['remove']),
+    ('ad', ['add']),
+    ('--upgarde', ['--upgrade']),
+    ('zzz', []),
+    ('', []),
+]
+
+
+@pytest.mark.parametrize('word,expected', SUGGEST_CASES)
+def test_suggest(word, expected):
+    index = TrigramIndex(['install', 'uninstall', 'add', 'remove',
+                          '--upgrade', '-u'])
+    assert expected == index.suggest(word)
+
+
+def test_suggest_limit():
+    index = TrigramIndex(['cmd{0}'.format(i) for i in range(10)])
+    assert ['cmd0', 'cmd1'] == index.suggest('cmd', 2)
+
+
+DID_YOU_MEAN_CASES = [
+    ([], ''),
+    (['a'], " (did you mean 'a'?)"),
+    (['a', 'b'], " (did you mean 'a' or 'b'?)"),
+]
+
+
+@pytest.mark.parametrize('names,expected', DID_YOU_MEAN_CASES)
+def test_did_you_mean(names, expected):
+    assert expected == did_you_mean(names)
+
+
+ERROR_CASES = [
+    (['instal', 'x'],
+     "suggest.py: error: argument {remote,install,uninstall}: invalid "
+     "choice: 'instal' (did you mean 'install' or 'uninstall'?)"),
+    (['remote', 'remve', 'x'],
+     "suggest.py remote: error: argument {add,remove}: invalid choice: "
+     "'remve' (did you mean 'remove'?)"),
+    (['zzz'],
+     "suggest.py: error: argument {remote,install,uninstall}: invalid "
+     "choice: 'zzz' (choose from 'remote', 'install', 'uninstall')"),
+    (['install', 'x', '--upgarde'],
+     "suggest.py install: error: unrecognized arguments: --upgarde "
+     "(did you mean '--upgrade'?)"),
+    (['remote', 'add', 'x', '--fecth'],
+     "suggest.py remote add: error: unrecognized arguments: --fecth "
+     "(did you mean '--fetch'?)"),
+    (['remote', 'add', 'x', 'y'],
+     "suggest.py remote add: error: unrecognized arguments: y"),
+]
+
+
+@pytest.mark.parametrize('args,message', ERROR_CASES)
+def test_suggestions(args, message):
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            program.execute(args)
+    assert message == stderr.getvalue().splitlines()[-1]
+
+
+def test_many_commands():
+    other = Program('other.py', max_listed=5)
+    for index in range(20):
+        other.command('cmd{0}'.format(index))(lambda: None)
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            other.execute(['zzz'])
+    assert stderr.getvalue().splitlines()[-1].endswith(
+        "invalid choice: 'zzz', see 'other.py help'")
+
+
+def make_trie():
+    trie = PrefixTrie()
+    for name, target in [('deploy', None), ('up', 'deploy'),
+                         ('delete', None), ('rm', 'delete'), ('run', None),
+                         ('runner', None)]:
+        trie.add(name, target)
+    return trie
+
+
+RESOLVE_CASES = [
+    ('deploy', 'deploy'),
+    ('dep', 'deploy'),
+    ('up', 'deploy'),
+    ('u', 'deploy'),
+    ('del', 'delete'),
+    ('rm', 'delete'),
+    ('run', 'run'),
+    ('runn', 'runner'),
+    ('deployed', None),
+    ('x', None),
+    ('', None),
+]
+
+
+@pytest.mark.parametrize('prefix,target', RESOLVE_CASES)
+def test_resolve(prefix, target):
+    assert target == make_trie().resolve(prefix)
+
+
+AMBIGUOUS_CASES = [
+    ('de', ['delete', 'deploy']),
+    ('r', ['delete', 'run', 'runner']),
+    ('ru', ['run', 'runner']),
+]
+
+
+@pytest.mark.parametrize('prefix,candidates', AMBIGUOUS_CASES)
+def test_resolve_ambiguous(prefix, candidates):
+    with pytest.raises(AmbiguousPrefix) as exc:
+        make_trie().resolve(prefix)
+    assert candidates == exc.value.candidates
+
+
+def test_trie_get():
+    trie = make_trie()
+    assert ('deploy', None, 'delete') == (trie.get('up'), trie.get('dep'),
+                                          trie.get('rm'))
+    with pytest.raises(ValueError):
+        trie.add('up')
+
+
+prefixed = Program('prefixed.py', command_prefixes=True)
+database = prefixed.add_subprog('database', aliases=['db'])
+
+
+@prefixed.command(aliases=['up'])
+def deploy(target):
+    '''Deploy a target.'''
+    return 'deploy ' + target
+
+
+@prefixed.command
+def delete(target):
+    return 'delete ' + target
+
+
+@database.command
+def migrate():
+    return 'migrated'
+
+
+PREFIX_CASES = [
+    ('deploy x', 'deploy x'),
+    ('dep x', 'deploy x'),
+    ('up x', 'deploy x'),
+    ('dele x', 'delete x'),
+    ('data migrate', 'migrated'),
+    ('db mig', 'migrated'),
+]
+
+
+@pytest.mark.parametrize('args,result', PREFIX_CASES)
+def test_command_prefixes(args, result):
+    assert result == prefixed.execute(args.split())
+
+
+PREFIX_ERROR_CASES = [
+    (prefixed, ['de', 'x'], "ambiguous choice: 'de' could match 'delete', "
+                            "'deploy'"),
+    (program, ['inst', 'x'], "invalid choice: 'inst'"),
+    (program, ['remote', 're', 'x'], "invalid choice: 're'"),
+]
+
+
+@pytest.mark.parametrize('prog,args,message', PREFIX_ERROR_CASES)
+def test_command_prefixes_errors(prog, args, message):
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            prog.execute(args)
+    assert message in stderr.getvalue()
+
+
+def test_aliases_listed_once():
+    with capture.capture_sys_output() as (stdout, stderr):
+        with pytest.raises(SystemExit):
+            prefixed.execute(['--help'])
+    assert '{database,deploy,delete}' in stdout.getvalue()
+    assert 'database (db)' in stdout.getvalue()
+    assert 'deploy (up)' in stdout.getvalue()
+    assert ['database', 'deploy', 'delete'] == \
+        list(prefixed._subparsers.choices)
+
+
+def test_help_command_prefixes():
+    other = Program('other.py', help_command=True, command_prefixes=True)
+    other.command(deploy)
+    with capture.capture_sys_output() as (stdout, stderr):
+        other.execute(['help', 'dep'])
+    assert stdout.getvalue().startswith('usage: other.py deploy')
@@ -0,0 +1,179 @@
+import argparse
+import pytest
+from mando import OptionGroup, Program
+from mando.types import (LazyFile, MappedFile, Records, batched,
+                         close_resources)
+
+
+program = Program('example.py', '1.0.10')
+program.option('--log', type=LazyFile)
+inputs = OptionGroup()
+inputs.option('--extra', type=LazyFile)
+opened = []
+
+
+@program.command
+def count(data: MappedFile, needle='x'):
+    opened.append(data)
+    needle = needle.encode()
+    total = 0
+    found = data.find(needle)
+    while found != -1:
+        total += 1
+        found = data.find(needle, found + len(needle))
+    return total
+
+
+@program.command
+def head(source, lines=1):
+    '''Print the first lines.
+
+    :param source <file>: The file to read.
+    :param -n, --lines <int>: How many lines.'''
+    opened.append(source)
+    return [source.readline() for _ in range(lines)]
+
+
+@program.command
+def total(rows: Records['ndjson', 2]):
+    opened.append(rows)
+    return [sum(row['n'] for row in batch) for batch in rows]
+
+
+@program.command
+def columns(table):
+    '''Return the first column.
+
+    :param table <csv>: The CSV file.'''
+    opened.append(table)
+    return [row[0] for row in table]
+
+
+@program.command(options=[inputs])
+def both():
+    opened.extend([program.log, program.extra])
+    return program.log.readline(), program.extra.readline()
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / 'data.txt'
+    path.write_bytes(b'xax\nbxb\nccc\n')
+    return str(path)
+
+
+def test_mapped_file(data_file):
+    with MappedFile(data_file) as data:
+        assert data.closed
+        assert len(data) == 12
+        assert data[:3] == b'xax'
+        assert data.find(b'ccc') == 8
+        assert not data.closed
+    assert data.closed
+
+
+def test_mapped_empty_file(tmp_path):
+    path = tmp_path / 'empty'
+    path.write_bytes(b'')
+    data = MappedFile(str(path))
+    assert data.view.tobytes() == b''
+    assert data.mmap is None
+    assert -1 == data.find(b'x')
+    assert -1 == data.rfind(b'x', 0)
+    assert b'' == data.readline()
+    assert 0 == data.size() == data.tell()
+    data.close()
+    assert data.closed
+
+
+def test_lazy_file(data_file):
+    source = LazyFile(data_file)
+    assert source.closed
+    assert list(source) == [b'xax\n', b'bxb\n', b'ccc\n']
+    assert not source.closed
+    close_resources([[source]])
+    assert source.closed
+
+
+@pytest.mark.parametrize('cls', [LazyFile, MappedFile])
+def test_missing_file(cls, tmp_path):
+    with pytest.raises(argparse.ArgumentTypeError):
+        cls(str(tmp_path / 'missing'))
+
+
+def test_mapped_file_stdin():
+    with pytest.raises(argparse.ArgumentTypeError):
+        MappedFile('-')
+    assert LazyFile('-').path == '-'
+
+
+@pytest.fixture
+def ndjson_file(tmp_path):
+    path = tmp_path / 'data.ndjson'
+    path.write_text('{"n": 1}\n{"n": 2}\n\n{"n": 3}\n')
+    return str(path)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a,b\n"c,d",e\n')
+    return str(path)
+
+
+def test_records_types():
+    assert Records['ndjson'] is Records['ndjson']
+    assert Records['csv', 10].batch_size == 10
+    with pytest.raises(ValueError):
+        Records['xml']
+    with pytest.raises(ValueError):
+        Records['csv', 0]
+    with pytest.raises(TypeError):
+        Records('-')
+
+
+def test_records(ndjson_file, csv_file):
+    records = Records['ndjson'](ndjson_file)
+    assert [{'n': 1}, {'n': 2}, {'n': 3}] == list(records)
+    assert [['a', 'b'], ['c,d', 'e']] == list(Records['csv'](csv_file))
+
+
+BATCHED_CASES = [
+    ([], 2, []),
+    ([1, 2, 3], 2, [[1, 2], [3]]),
+    ([1, 2, 3], 3, [[1, 2, 3]]),
+]
+
+
+@pytest.mark.parametrize('items,size,batches', BATCHED_CASES)
+def test_batched(items, size, batches):
+    assert batches == list(batched(items, size))
+
+
+def test_program_records(ndjson_file, csv_file):
+    del opened[:]
+    assert [3, 3] == program.execute(['total', ndjson_file])
+    assert ['a', 'c,d'] == program.execute(['columns', csv_file])
+    assert all(records.closed for records in opened)
+
+
+PROGRAM_EXECUTE_CASES = [
+    ('count {0}', 3),
+    ('count {0} --needle b', 2),
+    ('head {0}', [b'xax\n']),
+    ('head {0} -n 2', [b'xax\n', b'bxb\n']),
+]
+
+
+@pytest.mark.parametrize('args,result', PROGRAM_EXECUTE_CASES)
+def test_program_execute(data_file, args, result):
+    del opened[:]
+    assert result == program.execute(args.format(data_file).split())
+    assert opened[0].closed
+
+
+def test_program_options_closed(data_file):
+    del opened[:]
+    args = ['--log', data_file, 'both', '--extra', data_file]
+    assert (b'xax\n', b'xax\n') == program.execute(args)
+    assert all(resource.closed for resource in opened)
@@ -1,5 +1,9 @@
+import io
 import pytest
-from mando.utils import action_by_type, ensure_dashes, find_param_docs, split_doc
+from mando.utils import (action_by_type, analyze_doc, detect_doctype,
+                         ensure_dashes, find_param_docs, split_doc,
+                         iter_delimited, purify_doc, tokenize_fields,
+                         split_fields, write_atomic)
 
 
 ACTION_BY_TYPE_CASES = [
@@ -93,3 +97,158 @@ def test_find_param(doc, params):
             assert value[0] == found_value[0]
             for kwarg, val in value[1].items():
                 assert val == found_value[1][kwarg]
+
+
+ITER_DELIMITED_CASES = [
+    (b'', []),
+    (b'a', ['a']),
+    (b'a\nbb\nccc\n', ['a', 'bb', 'ccc']),
+    (b'a\r\n\nbb', ['a', 'bb']),
+    (b'a b\0c\nd\0', ['a b', 'c\nd']),
+    (b'abcdefgh\0ij', ['abcdefgh', 'ij']),
+    ('a\0b', ['a', 'b']),
+    # the separator is chosen from the first chunk containing one
+    (b'a\nb\0c\n', ['a', 'b\0c']),
+]
+
+
+@pytest.mark.parametrize('data,values', ITER_DELIMITED_CASES)
+def test_iter_delimited(data, values):
+    stream = io.StringIO(data) if isinstance(data, str) else io.BytesIO(data)
+    assert values == list(iter_delimited(stream, chunk_size=3))
+
+
+class ShortReads(io.RawIOBase):
+    '''A pipe whose writer sends one chunk at a time.'''
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_iter_delimited_short_reads():
+    raw = ShortReads([b'a\n', b'b\nc', b'\n'])
+    values = iter_delimited(io.BufferedReader(raw))
+    # the values are yielded before the end of the input
+    assert 'a' == next(values)
+    assert 2 == len(raw.chunks)
+    assert ['b', 'c'] == list(values)
+
+
+TOKENIZE_FIELDS_CASES = [
+    ('', ('', [])),
+    (':param a: b', (':param a: b', [])),
+    ('x\n:param a: b\n  c\n\n d\ny\n', ('x\ny\n', [
+        ('param', 'a', None, None, ' b\n  c\n\n d\n'),
+    ])),
+    (' :param a: b\n  c\n d\n', (' d\n', [
+        ('param', 'a', None, None, ' b\n  c\n'),
+    ])),
+    ('  :type -n, --num <int>:\n', ('', [
+        ('type', '-n,', '--num', '<int>', '\n'),
+    ])),
+    (':param a<int>: b\n', ('', [('param', 'a', '<int>', None, ' b\n')])),
+    (':parameter x: y\n', ('', [('param', 'eter', 'x', None, ' y\n')])),
+    (':param a b c d: e\n', (':param a b c d: e\n', [])),
+    (':returns:\n:rtype: int\n', ('', [
+        ('returns', None, None, None, '\n'),
+        ('rtype', None, None, None, ' int\n'),
+    ])),
+]
+
+
+@pytest.mark.parametrize('doc,result', TOKENIZE_FIELDS_CASES)
+def test_tokenize_fields(doc, result):
+    assert result == tokenize_fields(doc)
+
+
+def test_split_fields():
+    doc = '''Help.
+
+    :param -n <int>: Number.
+    :param name: Name.'''
+    text, params = split_fields(doc)
+    assert text == purify_doc(doc + '\n')
+    assert params == find_param_docs(doc)
+
+
+ADVERSARIAL_CASES = [
+    (':param ' + 'a' * 5000 + ' !\n', {}),
+    (':param a: b\n' + '  c\n\n\n' * 5000, {'a'}),
+    (''.join(':param p{0}: h\n\n'.format(i) for i in range(2000)),
+     set('p{0}'.format(i) for i in range(2000))),
+]
+
+
+@pytest.mark.parametrize('doc,names', ADVERSARIAL_CASES)
+def test_adversarial_fields(doc, names):
+    assert set(names) == set(find_param_docs(doc))
+    assert purify_doc(doc) == ('' if names else doc.rstrip())
+
+
+DETECT_DOCTYPE_CASES = [
+    ('Summary only.', 'rest'),
+    ('Summary.\n\n:param a: Help.', 'rest'),
+    ('Summary.\n\n    :type a: int\n    :param a: Help.', 'rest'),
+    ('Summary.\n\nParameters\n----------\na : int\n    Help.', 'numpy'),
+    ('Summary.\n\nNotes\n=====\nA note.', 'numpy'),
+    ('Summary.\n\nArgs:\n    a (int): Help.', 'google'),
+    ('Summary.\n\nReturns:\n    int: The result.', 'google'),
+    ('Summary.\n\nSee also:\n---------', 'google'),
+    ('Summary\n-------\n\nText.', 'rest'),
+    ('Summary.\n\nUsage:\n    prog a', 'rest'),
+    ('Summary.\n\nNote:\n    A note.\n\n:param a: Help.', 'rest'),
+    ('Summary.\n\nExample:\n    prog a\n:param a: Help.', 'rest'),
+]
+
+
+@pytest.mark.parametrize('doc,doctype', DETECT_DOCTYPE_CASES)
+def test_detect_doctype(doc, doctype):
+    assert doctype == detect_doctype(doc)
+
+
+def test_analyze_doc_auto():
+    doc = 'Summary.\n\nArgs:\n    a (int): Help.\n'
+    assert analyze_doc(doc, 'google') == analyze_doc(doc, 'auto')
+    doc = 'Summary.\n\nNote:\n    A note.\n\n:param a: Help.\n'
+    cmd_help, cmd_desc, params = analyze_doc(doc, 'auto')
+    assert ['a'] == list(params)
+    assert ':param' not in cmd_desc
+    with pytest.raises(ValueError):
+        analyze_doc(doc, 'epytext')
+
+
+def test_analyze_doc_cache():
+    doc = 'Summary.\n\n:param -n <int>: A number.\n'
+    analyze_doc.cache_clear()
+    first = analyze_doc(doc)
+    assert first is analyze_doc(doc)
+    info = analyze_doc.cache_info()
+    assert (1, 1) == (info.hits, info.misses)
+    opts, meta = first[2]['n']
+    assert ('-n',) == opts
+    assert int is meta['type']
+    with pytest.raises(TypeError):
+        meta['type'] = str
+    with pytest.raises(TypeError):
+        first[2]['m'] = ((), {})
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / 'cache' / 'data.bin'
+    assert write_atomic(str(path), b'old')
+    assert write_atomic(str(path), b'new')
+    assert b'new' == path.read_bytes()
+    assert ['data.bin'] == [p.name for p in path.parent.iterdir()]
+    # a directory is in the way
+    assert not write_atomic(str(tmp_path / 'cache'), b'')
+    assert ['cache'] == [p.name for p in tmp_path.iterdir()]
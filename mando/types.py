@@ -0,0 +1,257 @@
+'''Parameter types giving commands efficient access to the files they work
+on. They can be used as type annotations or in the docstring with the
+``<file>``, ``<mmap>``, ``<ndjson>`` and ``<csv>`` notation.
+
+Files are opened lazily, the first time they are actually used, and
+:py:meth:`mando.core.Program.execute` closes them once the command returns.'''
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import mmap
+import os
+import sys
+
+
+BUFFER_SIZE = 1 << 20
+STDIN = '-'
+
+
+class FileResource:
+    '''Base class for the parameter types wrapping a file path. The path is
+    checked when the command line is parsed, but the file is opened only on
+    first use.
+
+    :param path: The path of the file, or ``-`` for the standard input.'''
+
+    _allow_stdin = True
+
+    def __init__(self, path):
+        if path != STDIN or not self._allow_stdin:
+            try:
+                os.stat(path)
+            except OSError as e:
+                raise argparse.ArgumentTypeError(
+                    "can't open '{0}': {1}".format(path, e.strerror))
+        self.path = path
+        self._fobj = None
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._fobj is None
+
+    def _open(self):
+        if self._fobj is None:
+            if self.path == STDIN:
+                self._fobj = sys.stdin.buffer
+            else:
+                self._fobj = open(self.path, 'rb', buffering=BUFFER_SIZE)
+        return self._fobj
+
+    def close(self):
+        '''Close the underlying file, if it was opened. The standard input is
+        never closed.'''
+        fobj, self._fobj = self._fobj, None
+        if fobj is not None and self.path != STDIN:
+            fobj.close()
+
+
+class LazyFile(FileResource):
+    '''A buffered binary file, opened the first time one of its methods is
+    used. Everything else is delegated to the file object, so instances can
+    be read, iterated and seeked as usual.'''
+
+    @property
+    def file(self):
+        '''The underlying buffered binary file.'''
+        return self._open()
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._open(), attr)
+
+    def __iter__(self):
+        return iter(self._open())
+
+
+class _EmptyMap(io.BytesIO):
+    '''Stands for the map of an empty file, which cannot be mapped.'''
+
+    def find(self, sub, *args):
+        return b''.find(sub, *args)
+
+    def rfind(self, sub, *args):
+        return b''.rfind(sub, *args)
+
+    def size(self):
+        return 0
+
+
+class MappedFile(FileResource):
+    '''A read-only memory map of a file. The contents are available without
+    copies through :py:attr:`view`, a :py:class:`memoryview`, while the
+    methods of :py:class:`mmap.mmap` (``find``, ``readline`` and so on) are
+    delegated to the map itself. Those of an empty file behave as on an empty
+    map.'''
+
+    _allow_stdin = False
+
+    def __init__(self, path):
+        super(MappedFile, self).__init__(path)
+        self._mmap = None
+        self._empty = None
+        self._view = None
+
+    @property
+    def mmap(self):
+        '''The underlying :py:class:`mmap.mmap` object, or ``None`` for empty
+        files, which cannot be mapped.'''
+        self._map()
+        return self._mmap
+
+    @property
+    def view(self):
+        '''A read-only :py:class:`memoryview` over the whole file.'''
+        return self._map()
+
+    @property
+    def closed(self):
+        return self._view is None
+
+    def _map(self):
+        if self._view is None:
+            fobj = self._open()
+            if os.fstat(fobj.fileno()).st_size:
+                self._mmap = mmap.mmap(fobj.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+            else:
+                self._empty = _EmptyMap()
+                self._view = memoryview(b'')
+        return self._view
+
+    def __len__(self):
+        return len(self._map())
+
+    def __getitem__(self, key):
+        return self._map()[key]
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        self._map()
+        return getattr(self._mmap if self._empty is None else self._empty,
+                       attr)
+
+    def close(self):
+        '''Release the view and unmap the file. If views derived from
+        :py:attr:`view` are still alive, unmapping is left to the garbage
+        collector.'''
+        view, self._view = self._view, None
+        mapping, self._mmap = self._mmap, None
+        self._empty = None
+        try:
+            if view is not None:
+                view.release()
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            pass
+        super(MappedFile, self).close()
+
+
+class Records(FileResource):
+    '''A lazy iterator over the records of a file, decoded incrementally
+    while iterating. Concrete types are obtained by subscription:
+
+        * ``Records['ndjson']`` yields one JSON value per non-blank line;
+        * ``Records['csv']`` yields the rows of a CSV file, as lists;
+        * ``Records['ndjson', 1000]`` yields lists of up to 1000 records.
+
+    Peak memory is thus proportional to the batch size and not to the size
+    of the input. Records can be iterated only once; ``-`` stands for the
+    standard input.'''
+
+    format = None
+    batch_size = None
+    _types = {}
+
+    def __class_getitem__(cls, spec):
+        if not isinstance(spec, tuple):
+            spec = (spec,)
+        fmt, batch_size = (spec + (None,))[:2]
+        if fmt not in RECORD_READERS:
+            raise ValueError('unknown record format: {0!r}'.format(fmt))
+        if batch_size is not None and batch_size < 1:
+            raise ValueError('batch size must be positive')
+        key = (fmt, batch_size)
+        if key not in cls._types:
+            name = 'Records[{0}]'.format(', '.join(map(str, spec)))
+            cls._types[key] = type(name, (cls,), {'format': fmt,
+                                                  'batch_size': batch_size})
+        return cls._types[key]
+
+    def __init__(self, path):
+        if self.format is None:
+            raise TypeError('Records must be subscripted with a format, '
+                            "e.g. Records['ndjson']")
+        super(Records, self).__init__(path)
+
+    def _open(self):
+        if self._fobj is None:
+            if self.path == STDIN:
+                self._fobj = sys.stdin
+            else:
+                self._fobj = open(self.path, encoding='utf-8', newline='',
+                                  buffering=BUFFER_SIZE)
+        return self._fobj
+
+    def __iter__(self):
+        records = RECORD_READERS[self.format](self._open())
+        if self.batch_size is None:
+            return records
+        return batched(records, self.batch_size)
+
+
+def _read_ndjson(fobj):
+    for line in fobj:
+        if line.strip():
+            yield json.loads(line)
+
+
+RECORD_READERS = {
+    'ndjson': _read_ndjson,
+    'csv': csv.reader,
+}
+
+
+def batched(iterable, size):
+    '''Lazily group the items of *iterable* into lists of at most *size*
+    items.'''
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def close_resources(values):
+    '''Close all the :class:`FileResource` instances among *values*, looking
+    also into lists (as produced by ``nargs`` and the ``append`` action).'''
+    for value in values:
+        if isinstance(value, list):
+            close_resources(value)
+        elif isinstance(value, FileResource):
+            value.close()
@@ -1,14 +1,25 @@
+import functools
+import os
 import re
 import textwrap
+from types import MappingProxyType
 
-SPHINX_RE = re.compile(
-    r'^([\t ]*):'
-    r'(?P<field>param|type|returns|rtype|parameter|arg|argument|key|keyword)'
-    r' ?(?P<var1>[-\w_]+,?)?'
-    r' ?(?P<var2>[-<>\w_]+)?'
-    r' ?(?P<var3>[<>\w_]+)?:'
-    r'(?P<help>[^\n]*\n+((\1[ \t]+[^\n]*\n)|\n)*)',
-    re.MULTILINE)
+from mando.napoleon import GoogleDocstring, parse_docstring
+from mando.napoleon.docstring import _numpy_section_regex
+from mando.types import LazyFile, MappedFile, Records
+
+# Sphinx fields recognized in docstrings, in the order in which they are
+# tried: a ':parameter x:' line is first read as 'param' with 'eter' as its
+# first variable, for backward compatibility.
+FIELD_NAMES = ('param', 'type', 'returns', 'rtype', 'parameter', 'arg',
+               'argument', 'key', 'keyword')
+# The fields describing a parameter
+_PARAM_FIELDS = frozenset(['param', 'parameter', 'arg', 'argument', 'key',
+                           'keyword'])
+FIELD_RE = re.compile(r'([\t ]*):({0})'.format('|'.join(FIELD_NAMES)))
+FIELD_VAR_RES = (re.compile(r'[-\w]+,?'),
+                 re.compile(r'[-<>\w]+'),
+                 re.compile(r'[<>\w]+'))
 ARG_RE = re.compile(
     r'-(?P<long>-)?'
     r'(?P<key>(?(long)[^ =,]+|.))[ =]?'
@@ -20,13 +31,173 @@ ARG_TYPE_MAP = {
     'i': int, 'int': int, 'integer': int,
     's': str, 'str': str, 'string': str,
     'f': float, 'float': float,
+    'file': LazyFile, 'mmap': MappedFile,
+    'ndjson': Records['ndjson'], 'csv': Records['csv'],
     None: None, '': None,
 }
+# Number of docstrings whose analysis is kept by analyze_doc()
+DOC_CACHE_SIZE = 1024
+# The version of the layout of the cache files written by mando (help texts,
+# search indexes, entry points): bump when one of them changes
+CACHE_VERSION = 1
+
+
+@functools.lru_cache(maxsize=DOC_CACHE_SIZE)
+def analyze_doc(doc, doctype='rest'):
+    '''Extract the help, the description and the parameters documentation
+    from a docstring. A tuple ``(help, desc, paramdocs)`` is returned, where
+    ``paramdocs`` is a read-only mapping of the same form of the dictionary
+    returned by :func:`find_param_docs`, with tuples of options and read-only
+    keyword arguments: callers must copy them before making changes.
+
+    The results are shared by the whole process, with an LRU cache of
+    :data:`DOC_CACHE_SIZE` docstrings: ``analyze_doc.cache_info()`` reports
+    its hits and misses and ``analyze_doc.cache_clear()`` empties it.
+
+    :param doc: The docstring.
+    :param doctype: One of ``'rest'``, ``'numpy'``, ``'google'`` or
+        ``'auto'``, to pick one with :func:`detect_doctype`. Numpy and Google
+        docstrings are parsed directly into their parameters, without
+        converting them to reStructuredText.'''
+    if doctype == 'auto':
+        doctype = detect_doctype(doc)
+    if doctype == 'rest':
+        text, paramdocs = split_fields(doc)
+        cmd_help, cmd_desc = split_doc(text)
+    elif doctype in ('numpy', 'google'):
+        parsed = parse_docstring(doc, doctype)
+        cmd_help, cmd_desc = parsed.summary, parsed.description
+        cmd_desc = cmd_desc or cmd_help
+        paramdocs = {}
+        for param in parsed.parameters:
+            name, opts, _ = get_opts(param.name)
+            paramdocs[name.replace('-', '_')] = (opts, {
+                'metavar': None,
+                'type': ARG_TYPE_MAP.get(param.type),
+                'help': format_help('\n'.join(param.help)),
+            })
+    else:
+        raise ValueError('doctype must be one of "numpy", "google", '
+                         '"rest" or "auto"')
+    return cmd_help, cmd_desc, MappingProxyType(dict(
+        (name, (tuple(opts), MappingProxyType(meta)))
+        for name, (opts, meta) in paramdocs.items()))
+
+
+@functools.lru_cache(maxsize=1024)
+def detect_doctype(doc):
+    '''Guess the style of a docstring: ``'rest'`` if it has a Sphinx field
+    such as ``:param:`` anywhere, otherwise the style of the first line which
+    gives it away, a NumPy section header followed by its underline or a
+    Google section header such as ``Args:``. Docstrings with none of them are
+    treated as ``'rest'``. The result is cached per docstring.'''
+    previous = ''
+    doctype = None
+    for line in doc.splitlines():
+        line = line.strip()
+        lowered = line.lower()
+        if FIELD_RE.match(line):
+            # a section such as Note: may come before the fields
+            return 'rest'
+        if doctype is None:
+            if (previous in GoogleDocstring._sections and
+                    _numpy_section_regex.match(line)):
+                doctype = 'numpy'
+            elif lowered.endswith(':') and \
+                    lowered[:-1] in GoogleDocstring._sections:
+                doctype = 'google'
+        previous = lowered
+    return doctype or 'rest'
 
 
 def purify_doc(string):
     '''Remove Sphinx's :param: and :type: lines from the docstring.'''
-    return SPHINX_RE.sub('', string).rstrip()
+    return tokenize_fields(string)[0].rstrip()
+
+
+def split_fields(docstring):
+    '''Scan the docstring once and return a tuple ``(text, paramdocs)``,
+    where ``text`` is the docstring without its Sphinx fields and
+    ``paramdocs`` is the dictionary returned by :func:`find_param_docs`.'''
+    text, fields = tokenize_fields(docstring + '\n')
+    return text.rstrip(), _param_docs(fields)
+
+
+def tokenize_fields(string):
+    '''Split the string into the text outside Sphinx's fields and the fields
+    themselves, in a single pass over its lines.
+
+    A field starts with a line of the form ``:field var1 var2 var3: help``
+    and continues with the following lines which are either empty or more
+    indented than the first one. Only lines terminated by a newline are
+    considered. A tuple ``(text, fields)`` is returned, where each field is
+    a tuple ``(field, var1, var2, var3, help)``.'''
+    lines = string.split('\n')
+    last = len(lines) - 1
+    text = []
+    fields = []
+    i = 0
+    while i < last:
+        line = lines[i]
+        field = _match_field(line)
+        if field is None:
+            text.append(line)
+            i += 1
+            continue
+        indent, name, variables, help = field
+        # continuation lines: empty or indented more than the field
+        size = len(indent)
+        i += 1
+        while i < last:
+            line = lines[i]
+            if line and not (line.startswith(indent) and
+                             line[size:size + 1] in (' ', '\t')):
+                break
+            help.append(line)
+            i += 1
+        help.append('')
+        fields.append((name,) + variables + ('\n'.join(help),))
+    text.append(lines[last])
+    return '\n'.join(text), fields
+
+
+def _match_field(line):
+    '''Match the first line of a field, returning ``None`` or a tuple
+    ``(indent, field, (var1, var2, var3), [help])``.'''
+    m = FIELD_RE.match(line)
+    if m is None:
+        return None
+    indent, start = m.group(1), m.start(2)
+    for name in FIELD_NAMES:
+        if not line.startswith(name, start):
+            continue
+        rest = line[start + len(name):]
+        colon = rest.find(':')
+        if colon == -1:
+            return None
+        variables = _match_variables(rest[:colon])
+        if variables is not None:
+            return indent, name, variables, [rest[colon + 1:]]
+    return None
+
+
+def _match_variables(head):
+    '''Greedily match the (at most three) variables of a field, each one
+    optionally preceded by a space.'''
+    pos = 0
+    variables = []
+    for regex in FIELD_VAR_RES:
+        if head.startswith(' ', pos):
+            pos += 1
+        m = regex.match(head, pos)
+        if m is None:
+            variables.append(None)
+        else:
+            variables.append(m.group())
+            pos = m.end()
+    if pos != len(head):
+        return None
+    return tuple(variables)
 
 
 def split_doc(string):
@@ -52,15 +223,16 @@ def find_param_docs(docstring):
     '''Find Sphinx's :param:, :type:, :returns:, and :rtype: lines and return
        a dictionary of the form:
        ``param: (opts, {metavar: meta, type: type, help: help})``.'''
+    return _param_docs(tokenize_fields(docstring + '\n')[1])
+
+
+def _param_docs(fields):
+    '''Build the dictionary returned by :func:`find_param_docs` from the
+    fields found by :func:`tokenize_fields`.'''
     paramdocs = {}
     typedocs = {}
-    for m in SPHINX_RE.finditer(docstring + '\n'):
-        if m.group('field') in ['param',
-                                'parameter',
-                                'arg',
-                                'argument',
-                                'key',
-                                'keyword']:
+    for field, var1, var2, var3, help in fields:
+        if field in _PARAM_FIELDS:
             # mando
             #     :param name: Help text.               name   None   None    0
             #     :param name <type>: Help text.        name   <type> None    1
@@ -77,42 +249,45 @@ def find_param_docs(docstring):
 
             # The following is ugly, but it allows for backward compatibility
 
-            if m.group('var2') is None:  # 0, 2, 4, 8
-                vname = m.group('var1')
+            if var2 is None:  # 0, 2, 4, 8
+                vname = var1
                 vtype = None
             # 1, 3, 5
-            elif m.group('var2') is not None and '<' in m.group('var2'):
-                vname = m.group('var1')
-                vtype = m.group('var2')
-            elif '-' in m.group('var1') and '-' in m.group('var2'):  # 6, 7
-                vname = '{0} {1}'.format(m.group('var1'), m.group('var2'))
-                vtype = m.group('var3')
+            elif var2 is not None and '<' in var2:
+                vname = var1
+                vtype = var2
+            elif '-' in var1 and '-' in var2:  # 6, 7
+                vname = '{0} {1}'.format(var1, var2)
+                vtype = var3
             else:                        # 9
-                vname = m.group('var2')
-                vtype = m.group('var1')
+                vname = var2
+                vtype = var1
 
             name, opts, meta = get_opts('{0} {1}'.format(vname.strip(),
                                                          vtype or ''))
             name = name.replace('-', '_')
 
-            helpdoc = m.group('help').strip()
-            helpdoc = helpdoc.splitlines(True)
-            if len(helpdoc) > 1:
-                helpdoc = helpdoc[0] + textwrap.dedent(''.join(helpdoc[1:]))
-            else:
-                helpdoc = helpdoc[0]
             paramdocs[name] = (opts, {
                 'metavar': meta or None,
                 'type': ARG_TYPE_MAP.get(meta.strip('<>')),
-                'help': helpdoc,
+                'help': format_help(help),
             })
-        elif m.group('field') == 'type':
-            typedocs[m.group('var1').strip()] = m.group('help').strip()
+        elif field == 'type':
+            typedocs[var1.strip()] = help.strip()
     for key in typedocs:
         paramdocs[key][1]['type'] = ARG_TYPE_MAP.get(typedocs[key])
     return paramdocs
 
 
+def format_help(text):
+    '''Strip the help text of a parameter and dedent its continuation
+    lines.'''
+    lines = text.strip().splitlines(True)
+    if len(lines) > 1:
+        return lines[0] + textwrap.dedent(''.join(lines[1:]))
+    return ''.join(lines)
+
+
 def get_opts(param):
     '''Extract options from a parameter name.'''
     if param.startswith('-'):
@@ -154,3 +329,72 @@ def ensure_dashes(opts):
             yield opt
         else:
             yield '-' * (1 + 1 * (len(opt) > 1)) + opt
+
+
+def iter_delimited(stream, chunk_size=65536):
+    '''Lazily yield the values read from *stream*, separated either by NUL
+    characters (as in ``find -print0``) or by newlines. The separator is
+    chosen from the first chunk containing either of them: NUL if that chunk
+    contains one, newline otherwise. Later chunks do not change it.
+
+    The stream is read in chunks of at most *chunk_size*, so memory usage is
+    bounded by the chunk size and the length of the longest value, regardless
+    of the size of the input. Buffered streams are read with ``read1()``,
+    which returns what is available instead of waiting for a full chunk, so
+    that the values of a slow producer are yielded as they arrive. Empty
+    values are skipped and bytes are decoded with :py:func:`os.fsdecode`.'''
+    read = getattr(stream, 'read1', stream.read)
+    sep = None
+    tail = None
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        buf = chunk if tail is None else tail + chunk
+        if sep is None:
+            nul, newline = ('\0', '\n') if isinstance(buf, str) else \
+                (b'\0', b'\n')
+            if nul in buf:
+                sep = nul
+            elif newline in buf:
+                sep = newline
+            else:
+                tail = buf
+                continue
+        values = buf.split(sep)
+        tail = values.pop()
+        for value in values:
+            if value:
+                yield _decode_value(value, sep)
+    if tail:
+        yield _decode_value(tail, sep)
+
+
+def _decode_value(value, sep):
+    '''Decode a value yielded by :func:`iter_delimited`, dropping the
+    carriage return of CRLF-terminated lines.'''
+    if not isinstance(value, str):
+        value = os.fsdecode(value)
+    if sep is not None and sep in ('\n', b'\n'):
+        value = value.rstrip('\r')
+    return value
+
+
+def write_atomic(path, data):
+    '''Write the bytes *data* to the file at *path*, creating its directory
+    if needed. The file is replaced at once, so that other processes read
+    either its old or its new contents. Return whether it was written: since
+    the files are caches, errors are ignored.'''
+    tmp = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp, 'wb') as fobj:
+            fobj.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+    return True
@@ -28,6 +28,7 @@ setuptools.setup(
     platforms="any",
     long_description=readme,
     packages=setuptools.find_packages(),
+    python_requires=">=3.9",
     install_requires=deps,
     extras_require=extras,
     test_suite="mando.tests",
@@ -43,12 +44,6 @@ setuptools.setup(
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.3",
-        "Programming Language :: Python :: 3.4",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",